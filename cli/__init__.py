@@ -0,0 +1,2 @@
+from . import export_registry
+from . import migrate_binaries
@@ -0,0 +1,202 @@
+import ast
+import csv
+import json
+import logging
+import optparse
+import sys
+
+from odoo import SUPERUSER_ID, api
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+from ..models.models import EXPORT_CHUNK_SIZE
+
+_logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+
+
+class RdcExportRegistry(Command):
+    """Export the vehicle registry of rdc_printer to NDJSON, CSV or Parquet"""
+
+    name = "rdc_export"
+
+    def run(self, cmdargs):
+        parser = config.parser
+        group = optparse.OptionGroup(parser, "Registry export")
+        group.add_option(
+            "--format",
+            dest="export_format",
+            type="choice",
+            choices=EXPORT_FORMATS,
+            default="ndjson",
+            help="ndjson (default), csv or parquet (requires pyarrow)",
+        )
+        group.add_option(
+            "--output",
+            dest="output",
+            help="File to write, standard output by default (not for parquet)",
+        )
+        group.add_option(
+            "--domain",
+            dest="domain",
+            default="[]",
+            help='Vehicles to export, e.g. "[(\'region_code\', \'=\', \'01\')]"',
+        )
+        group.add_option(
+            "--fields",
+            dest="fields",
+            help="Comma separated fields (default: every stored non binary field)",
+        )
+        group.add_option(
+            "--include-binary",
+            dest="include_binary",
+            action="store_true",
+            default=False,
+            help="Also export the binary fields",
+        )
+        group.add_option(
+            "--no-documents",
+            dest="with_documents",
+            action="store_false",
+            default=True,
+            help="Leave out the documents metadata",
+        )
+        group.add_option(
+            "--chunk-size",
+            dest="chunk_size",
+            type="int",
+            default=EXPORT_CHUNK_SIZE,
+            help="Vehicles read per query (default %default)",
+        )
+        parser.add_option_group(group)
+        opt = config.parse_config(cmdargs, setup_logging=True)
+
+        dbname = config["db_name"]
+        if not dbname:
+            parser.error("a database is required (-d DATABASE)")
+        if opt.chunk_size < 1:
+            parser.error("--chunk-size must be a positive integer")
+        if opt.export_format == "parquet" and not opt.output:
+            parser.error("--output is required for parquet exports")
+
+        with Registry(dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            Vehicle = env["vehicle.registration"]
+            fnames = Vehicle._get_export_fields(
+                opt.fields and [f.strip() for f in opt.fields.split(",") if f.strip()],
+                with_binary=opt.include_binary,
+            )
+            chunks = iter_export_chunks(
+                Vehicle,
+                ast.literal_eval(opt.domain),
+                fnames,
+                opt.chunk_size,
+                opt.with_documents,
+            )
+            columns = fnames + (["documents"] if opt.with_documents else [])
+            if opt.export_format == "parquet":
+                count = write_parquet(Vehicle, chunks, columns, opt.output)
+            else:
+                output = (
+                    open(opt.output, "w", newline="", encoding="utf-8")
+                    if opt.output
+                    else sys.stdout
+                )
+                try:
+                    write = write_csv if opt.export_format == "csv" else write_ndjson
+                    count = write(chunks, columns, output)
+                finally:
+                    if output is not sys.stdout:
+                        output.close()
+        _logger.info(f"{count} vehicles exported")
+
+
+def iter_export_chunks(Vehicle, domain, fnames, chunk_size, with_documents):
+    """Yield the export rows chunk by chunk, in constant memory"""
+    after_id = 0
+    while True:
+        rows = Vehicle._get_export_chunk(
+            domain, fnames, after_id, chunk_size, with_documents
+        )
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["id"]
+        # Keep the ORM cache from growing with the export
+        Vehicle.env.invalidate_all()
+
+
+def write_ndjson(chunks, columns, output):
+    count = 0
+    for rows in chunks:
+        output.writelines(json.dumps(row) + "\n" for row in rows)
+        count += len(rows)
+    return count
+
+
+def write_csv(chunks, columns, output):
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    count = 0
+    for rows in chunks:
+        writer.writerows(
+            [
+                json.dumps(row[column]) if isinstance(row[column], list) else row[column]
+                for column in columns
+            ]
+            for row in rows
+        )
+        count += len(rows)
+    return count
+
+
+def parquet_value(value, boolean=False):
+    """Lists as JSON, and empty values (False for the ORM) as nulls"""
+    if isinstance(value, list):
+        return json.dumps(value)
+    if value is False and not boolean:
+        return None
+    return value
+
+
+def write_parquet(Vehicle, chunks, columns, path):
+    """Write one Parquet row group per chunk"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Parquet exports require pyarrow (pip install pyarrow)")
+
+    types = {
+        "integer": pyarrow.int64(),
+        "many2one": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "monetary": pyarrow.float64(),
+        "boolean": pyarrow.bool_(),
+    }
+    schema = pyarrow.schema(
+        [
+            (
+                column,
+                types.get(Vehicle._fields[column].type, pyarrow.string())
+                if column in Vehicle._fields
+                else pyarrow.string(),  # documents, as JSON
+            )
+            for column in columns
+        ]
+    )
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            data = {
+                column: [
+                    parquet_value(row[column], schema.field(column).type == pyarrow.bool_())
+                    for row in rows
+                ]
+                for column in columns
+            }
+            writer.write_table(pyarrow.table(data, schema=schema))
+            count += len(rows)
+    return count
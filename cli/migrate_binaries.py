@@ -0,0 +1,165 @@
+import base64
+import hashlib
+import logging
+import optparse
+
+from odoo import SUPERUSER_ID, api
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config, sql
+
+_logger = logging.getLogger(__name__)
+
+# Binary fields that were kept inline in their table by older installs
+INLINE_BINARY_FIELDS = [
+    ("vehicle.registration", "qr_code_image"),
+    ("vehicle.document", "document_file"),
+]
+
+
+class RdcMigrateBinaries(Command):
+    """Move inline QR images and document files of rdc_printer to the filestore"""
+
+    name = "rdc_migrate_binaries"
+
+    def run(self, cmdargs):
+        parser = config.parser
+        group = optparse.OptionGroup(parser, "Binary migration")
+        group.add_option(
+            "--batch-size",
+            dest="batch_size",
+            type="int",
+            default=500,
+            help="Rows moved per committed transaction (default 500)",
+        )
+        group.add_option(
+            "--drop-columns",
+            dest="drop_columns",
+            action="store_true",
+            default=False,
+            help="Drop the emptied columns once every row has been moved",
+        )
+        parser.add_option_group(group)
+        opt = config.parse_config(cmdargs, setup_logging=True)
+
+        dbname = config["db_name"]
+        if not dbname:
+            parser.error("a database is required (-d DATABASE)")
+
+        with Registry(dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            for model_name, field_name in INLINE_BINARY_FIELDS:
+                migrate_inline_binary(
+                    env, model_name, field_name, opt.batch_size, opt.drop_columns
+                )
+            backfill_document_checksums(env, opt.batch_size)
+
+
+def migrate_inline_binary(env, model_name, field_name, batch_size, drop_column=False):
+    """Move a binary column to ir.attachment, one committed batch at a time
+
+    Only the rows of the current batch are locked, so the module can stay in
+    use while the migration runs. Space freed in the table is reclaimed by
+    the next (auto)vacuum.
+    """
+    cr = env.cr
+    table = env[model_name]._table
+    if not sql.column_exists(cr, table, field_name):
+        return 0
+
+    Attachment = env["ir.attachment"]
+    moved = 0
+    while True:
+        cr.execute(
+            f"""
+            SELECT id, "{field_name}"
+              FROM "{table}"
+             WHERE "{field_name}" IS NOT NULL
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE
+            """,
+            [batch_size],
+        )
+        rows = cr.fetchall()
+        if not rows:
+            break
+
+        ids = [row[0] for row in rows]
+        # Records written since the upgrade already have their attachment
+        attached = set(
+            Attachment.search(
+                [
+                    ("res_model", "=", model_name),
+                    ("res_field", "=", field_name),
+                    ("res_id", "in", ids),
+                ]
+            ).mapped("res_id")
+        )
+        Attachment.create(
+            [
+                {
+                    "name": field_name,
+                    "res_model": model_name,
+                    "res_field": field_name,
+                    "res_id": record_id,
+                    "raw": base64.b64decode(bytes(value)),
+                }
+                for record_id, value in rows
+                if record_id not in attached
+            ]
+        )
+        cr.execute(
+            f'UPDATE "{table}" SET "{field_name}" = NULL WHERE id IN %s',
+            [tuple(ids)],
+        )
+        cr.commit()
+        moved += len(ids)
+        _logger.info(f"{model_name}.{field_name}: {moved} rows moved to the filestore")
+
+    if drop_column:
+        cr.execute(f'ALTER TABLE "{table}" DROP COLUMN "{field_name}"')
+        cr.commit()
+        _logger.info(f"{model_name}.{field_name}: column dropped")
+    return moved
+
+
+def backfill_document_checksums(env, batch_size):
+    """Hash the files of documents uploaded before checksums were recorded"""
+    cr = env.cr
+    Document = env["vehicle.document"]
+    done = 0
+    while True:
+        cr.execute(
+            """
+            SELECT d.id, a.id
+              FROM vehicle_document d
+              JOIN ir_attachment a
+                ON a.res_model = 'vehicle.document'
+               AND a.res_field = 'document_file'
+               AND a.res_id = d.id
+             WHERE d.checksum IS NULL
+             ORDER BY d.id
+             LIMIT %s
+            """,
+            [batch_size],
+        )
+        rows = cr.fetchall()
+        if not rows:
+            break
+
+        for document_id, attachment_id in rows:
+            attachment = env["ir.attachment"].browse(attachment_id)
+            raw = attachment.raw or b""
+            Document.browse(document_id).write(
+                {
+                    "checksum": hashlib.sha256(raw).hexdigest(),
+                    "file_size": len(raw),
+                    "mimetype": attachment.mimetype,
+                }
+            )
+        cr.commit()
+        env.invalidate_all()
+        done += len(rows)
+        _logger.info(f"vehicle.document: {done} checksums computed")
+    return done
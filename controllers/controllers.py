@@ -1,7 +1,177 @@
-from odoo import http
+from odoo import api, fields, http
+from odoo.exceptions import ValidationError
 from odoo.http import request
-import json
+from odoo.osv import expression
+from odoo.tools import split_every
+from psycopg2 import errors as pg_errors
+from datetime import date, datetime, timedelta
+from ..models.models import EXPORT_CHUNK_SIZE
 import base64
+import codecs
+import csv
+import hashlib
+import io
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Bulk registration chunking (rows created and committed together)
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_SIZE = 5000
+CSV_MIMETYPES = ("text/csv", "application/csv")
+
+# Unique index behind chassis number uniqueness (vehicle.registration)
+CHASSIS_UNIQUE_CONSTRAINT = "vehicle_registration_chassis_key_unique"
+
+# Longest accepted Idempotency-Key header
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Largest number of cards rendered by one batch print request
+BATCH_PRINT_MAX = 1000
+
+# Projections of GET /api/vehicle/<chassis_number>
+VEHICLE_DETAIL_FIELDS = [
+    "id",
+    "chassis_number",
+    "driver_name",
+    "driver_address",
+    "tax_number",
+    "brand",
+    "vehicle_type",
+    "manufacturing_year",
+    "color",
+    "fiscal_power",
+    "reference_number",
+    "first_registration",
+    "usage",
+    "plate_sequence",
+    "unique_plate_number",
+    "region_code",
+    "qr_code_data",
+    "print_date",
+    "is_reprinted",
+]
+VEHICLE_DETAIL_INCLUDES = ["documents", "print_history"]
+
+# Fields of the /api/vehicle/search results
+SEARCH_RESULT_FIELDS = [
+    "id",
+    "chassis_number",
+    "driver_name",
+    "brand",
+    "vehicle_type",
+    "plate_sequence",
+    "unique_plate_number",
+    "region_code",
+    "print_date",
+    "is_reprinted",
+]
+SEARCH_TOTAL_MODES = ("exact", "estimate", "none")
+
+# Change feed: rows per chunk
+SYNC_CHUNK_SIZE = 500
+SYNC_MAX_CHUNK_SIZE = 5000
+# (feed, model, change date field, fields), streamed in this order
+SYNC_FEEDS = [
+    (
+        "vehicles",
+        "vehicle.registration",
+        "write_date",
+        VEHICLE_DETAIL_FIELDS + ["write_date"],
+    ),
+    (
+        "documents",
+        "vehicle.document",
+        "write_date",
+        [
+            "id",
+            "vehicle_id",
+            "document_name",
+            "document_type",
+            "file_name",
+            "upload_date",
+            "checksum",
+            "file_size",
+            "mimetype",
+            "write_date",
+        ],
+    ),
+    (
+        "print_history",
+        "vehicle.print.history",
+        "write_date",
+        [
+            "id",
+            "vehicle_id",
+            "print_type",
+            "print_date",
+            "printer_name",
+            "print_status",
+            "notes",
+            "write_date",
+        ],
+    ),
+    # Append-only, so rows are never changed after their print_date
+    (
+        "print_log",
+        "vehicle.print.log",
+        "print_date",
+        [
+            "id",
+            "vehicle_id",
+            "job_id",
+            "print_type",
+            "print_date",
+            "printer_name",
+            "print_status",
+            "notes",
+        ],
+    ),
+    (
+        "deleted",
+        "vehicle.sync.tombstone",
+        "write_date",
+        ["id", "res_model", "res_id", "write_date"],
+    ),
+]
+
+# Registry export: content type per format and the largest chunk_size allowed
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_MAX_CHUNK_SIZE = 10000
+
+# Period covered by /api/vehicle/stats when no dates are given
+STATS_DEFAULT_DAYS = 30
+
+# Batch lookup: largest number of keys and the fields returned per vehicle
+LOOKUP_MAX = 1000
+LOOKUP_FIELDS = [
+    "id",
+    "chassis_number",
+    "plate_sequence",
+    "unique_plate_number",
+    "driver_name",
+    "brand",
+    "vehicle_type",
+    "region_code",
+    "print_date",
+    "is_reprinted",
+]
+# API key -> field
+DOCUMENT_DETAIL_FIELDS = {
+    "id": "id",
+    "name": "document_name",
+    "type": "document_type",
+    "filename": "file_name",
+    "upload_date": "upload_date",
+}
+HISTORY_DETAIL_FIELDS = {
+    "print_type": "print_type",
+    "print_date": "print_date",
+    "printer_name": "printer_name",
+    "status": "print_status",
+    "notes": "notes",
+}
 
 
 class VehicleRegistrationController(http.Controller):
@@ -17,7 +187,11 @@ class VehicleRegistrationController(http.Controller):
         """
         Single API endpoint for complete vehicle registration
         Handles: vehicle data + document uploads + QR generation + plate assignment
+        Retries carrying the same Idempotency-Key header get the first response
         """
+        return self._idempotent(lambda: self._register_vehicle_complete(**kwargs))
+
+    def _register_vehicle_complete(self, **kwargs):
         try:
             # Get form data and files
             chassis_number = kwargs.get("chassis_number")
@@ -29,79 +203,26 @@ class VehicleRegistrationController(http.Controller):
             if not region_code:
                 return self._error_response("Region code is required", 400)
 
-            # Check if vehicle already exists
-            existing_vehicle = (
-                request.env["vehicle.registration"]
-                .sudo()
-                .search([("chassis_number", "=", chassis_number)], limit=1)
-            )
+            # Create vehicle record
+            vehicle_data = self._prepare_vehicle_vals(kwargs)
 
-            if existing_vehicle:
+            # Create the vehicle, the unique chassis key rejects duplicates
+            vehicle = self._create_vehicle(vehicle_data)
+            if not vehicle:
                 return self._error_response(
                     f"Vehicle with chassis number {chassis_number} already exists", 409
                 )
 
-            # Create vehicle record
-            vehicle_data = {
-                "chassis_number": chassis_number,
-                "driver_name": kwargs.get("driver_name"),
-                "driver_address": kwargs.get("driver_address"),
-                "tax_number": kwargs.get("tax_number"),
-                "brand": kwargs.get("brand"),
-                "vehicle_type": kwargs.get("vehicle_type"),
-                "manufacturing_year": int(kwargs.get("manufacturing_year", 0)) or None,
-                "color": kwargs.get("color"),
-                "fiscal_power": int(kwargs.get("fiscal_power", 0)) or None,
-                "reference_number": kwargs.get("reference_number"),
-                "first_registration": int(kwargs.get("first_registration", 0)) or None,
-                "usage": kwargs.get("usage"),
-                "region_code": region_code,
-            }
-
-            # Remove None values
-            vehicle_data = {k: v for k, v in vehicle_data.items() if v is not None}
-
-            # Create the vehicle
-            vehicle = request.env["vehicle.registration"].sudo().create(vehicle_data)
+            # Async mode: only the vehicle and its plate are created in this
+            # request, QR code and documents go through the pipeline
+            if self._wants_async(kwargs):
+                return self._register_async(vehicle, kwargs)
 
             # Generate QR code and plate numbers automatically
             vehicle.generate_qr_code()
 
             # Handle document uploads
-            uploaded_documents = []
-            files = request.httprequest.files
-
-            for file_key in files:
-                uploaded_file = files[file_key]
-                if uploaded_file and uploaded_file.filename:
-
-                    # Determine document type from form data or filename
-                    doc_type = kwargs.get(f"{file_key}_type", "other")
-                    doc_name = kwargs.get(f"{file_key}_name", uploaded_file.filename)
-
-                    # Create document record
-                    document = (
-                        request.env["vehicle.document"]
-                        .sudo()
-                        .create(
-                            {
-                                "vehicle_id": vehicle.id,
-                                "document_name": doc_name,
-                                "document_type": doc_type,
-                                "document_file": base64.b64encode(uploaded_file.read()),
-                                "file_name": uploaded_file.filename,
-                            }
-                        )
-                    )
-
-                    uploaded_documents.append(
-                        {
-                            "id": document.id,
-                            "name": doc_name,
-                            "type": doc_type,
-                            "filename": uploaded_file.filename,
-                        }
-                    )
+            uploaded_documents = self._create_uploaded_documents(vehicle, kwargs)
 
             # Create initial print history record
             request.env["vehicle.print.history"].sudo().create(
@@ -157,83 +278,263 @@ class VehicleRegistrationController(http.Controller):
         csrf=False,
     )
     def get_vehicle_complete(self, chassis_number, **kwargs):
-        """Get complete vehicle information including documents and history"""
+        """Get complete vehicle information including documents and history
+
+        fields: comma separated vehicle fields to return (default: all)
+        include: comma separated related data to add, among "documents" and
+        "print_history" (default: both, "include=" for none)
+        """
         try:
-            vehicle = (
-                request.env["vehicle.registration"]
-                .sudo()
-                .search([("chassis_number", "=", chassis_number)], limit=1)
+            vehicle_fields = self._get_list_param(kwargs, "fields", VEHICLE_DETAIL_FIELDS)
+            if not vehicle_fields:
+                # search_read would read every field, binaries included
+                return self._error_response("fields must list at least one field", 400)
+            includes = self._get_list_param(kwargs, "include", VEHICLE_DETAIL_INCLUDES)
+            unknown = set(vehicle_fields) - set(VEHICLE_DETAIL_FIELDS)
+            unknown |= set(includes) - set(VEHICLE_DETAIL_INCLUDES)
+            if unknown:
+                return self._error_response(
+                    f"Unknown fields or includes: {', '.join(sorted(unknown))}", 400
+                )
+
+            Vehicle = request.env["vehicle.registration"].sudo()
+            vehicles = Vehicle.search_read(
+                [("chassis_key", "=", Vehicle._normalize_chassis(chassis_number))],
+                vehicle_fields,
+                limit=1,
+                load=None,
             )
 
-            if not vehicle:
+            if not vehicles:
                 return self._error_response("Vehicle not found", 404)
 
-            # Get documents
-            documents = []
-            for doc in vehicle.document_ids:
-                documents.append(
+            vehicle = vehicles[0]
+            data = {
+                "success": True,
+                "vehicle": {
+                    name: self._json_value(value) for name, value in vehicle.items()
+                },
+            }
+            counts = {}
+
+            if "documents" in includes:
+                documents = (
+                    request.env["vehicle.document"]
+                    .sudo()
+                    .search_read(
+                        [("vehicle_id", "=", vehicle["id"])],
+                        list(DOCUMENT_DETAIL_FIELDS.values()),
+                        load=None,
+                    )
+                )
+                data["documents"] = [
                     {
-                        "id": doc.id,
-                        "name": doc.document_name,
-                        "type": doc.document_type,
-                        "filename": doc.file_name,
-                        "upload_date": (
-                            doc.upload_date.isoformat() if doc.upload_date else None
-                        ),
+                        key: self._json_value(doc[name])
+                        for key, name in DOCUMENT_DETAIL_FIELDS.items()
                     }
+                    for doc in documents
+                ]
+                counts["documents"] = len(documents)
+
+            if "print_history" in includes:
+                # Print jobs, and the direct prints of the log (spooled jobs
+                # are logged too, with their job_id)
+                history_fields = list(HISTORY_DETAIL_FIELDS.values())
+                history_records = request.env["vehicle.print.history"].sudo().search_read(
+                    [("vehicle_id", "=", vehicle["id"])], history_fields, load=None
+                ) + request.env["vehicle.print.log"].sudo().search_read(
+                    [("vehicle_id", "=", vehicle["id"]), ("job_id", "=", False)],
+                    history_fields,
+                    load=None,
+                )
+                history_records.sort(
+                    key=lambda history: history["print_date"] or datetime.min,
+                    reverse=True,
                 )
+                data["print_history"] = [
+                    {
+                        key: self._json_value(history[name])
+                        for key, name in HISTORY_DETAIL_FIELDS.items()
+                    }
+                    for history in history_records
+                ]
+                counts["prints"] = len(history_records)
 
-            # Get print history
-            print_history = []
-            history_records = (
-                request.env["vehicle.print.history"]
-                .sudo()
-                .search([("vehicle_id", "=", vehicle.id)], order="print_date desc")
+            if counts:
+                data["counts"] = counts
+
+            return request.make_response(
+                json.dumps(data), headers=[("Content-Type", "application/json")]
             )
 
-            for history in history_records:
-                print_history.append(
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    def _get_list_param(self, params, name, default):
+        """Comma separated request parameter, default when it is absent"""
+        if name not in params:
+            return list(default)
+        return [value.strip() for value in params[name].split(",") if value.strip()]
+
+    def _json_value(self, value):
+        """Serialize a value read from the ORM the way the API returns it"""
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+
+    def _create_uploaded_documents(self, vehicle, params):
+        """Create vehicle.document records for the files of the request"""
+        uploaded_documents = []
+        files = request.httprequest.files
+
+        for file_key in files:
+            uploaded_file = files[file_key]
+            if uploaded_file and uploaded_file.filename:
+
+                # Determine document type from form data or filename
+                doc_type = params.get(f"{file_key}_type", "other")
+                doc_name = params.get(f"{file_key}_name", uploaded_file.filename)
+
+                # Create document record, its file is streamed to the filestore
+                document = (
+                    request.env["vehicle.document"]
+                    .sudo()
+                    ._create_from_upload(
+                        uploaded_file,
+                        {
+                            "vehicle_id": vehicle.id,
+                            "document_name": doc_name,
+                            "document_type": doc_type,
+                            "file_name": uploaded_file.filename,
+                        },
+                    )
+                )
+
+                uploaded_documents.append(
                     {
-                        "print_type": history.print_type,
-                        "print_date": (
-                            history.print_date.isoformat()
-                            if history.print_date
-                            else None
-                        ),
-                        "printer_name": history.printer_name,
-                        "status": history.print_status,
-                        "notes": history.notes,
+                        "id": document.id,
+                        "name": doc_name,
+                        "type": doc_type,
+                        "filename": uploaded_file.filename,
+                        "checksum": document.checksum,
+                        "size": document.file_size,
                     }
                 )
 
+        return uploaded_documents
+
+    def _wants_async(self, params):
+        """Async registration: mode=async or a "Prefer: respond-async" header"""
+        prefer = request.httprequest.headers.get("Prefer", "")
+        return params.get("mode") == "async" or "respond-async" in prefer
+
+    def _register_async(self, vehicle, params):
+        """Stage uploads, queue the pipeline and answer 202 right away"""
+        staged_documents = []
+        files = request.httprequest.files
+
+        for file_key in files:
+            uploaded_file = files[file_key]
+            if uploaded_file and uploaded_file.filename:
+                # The file is streamed to the filestore and staged as an
+                # attachment, the documents stage hands it over to the
+                # vehicle.document record it creates
+                Document = request.env["vehicle.document"].sudo()
+                file_values = Document._stream_to_filestore(
+                    uploaded_file.stream, uploaded_file.filename
+                )
+                sha256 = file_values.pop("sha256")
+                attachment = (
+                    request.env["ir.attachment"]
+                    .sudo()
+                    .create(dict(file_values, res_model=vehicle._name, res_id=vehicle.id))
+                )
+                staged_documents.append(
+                    {
+                        "attachment_id": attachment.id,
+                        "checksum": sha256,
+                        "name": params.get(f"{file_key}_name", uploaded_file.filename),
+                        "type": params.get(f"{file_key}_type", "other"),
+                        "filename": uploaded_file.filename,
+                    }
+                )
+
+        vehicle._start_registration_pipeline(staged_documents)
+
+        request.env["vehicle.print.history"].sudo().create(
+            {
+                "vehicle_id": vehicle.id,
+                "print_type": "license_plate",
+                "printer_name": params.get("printer_name", "Default"),
+                "print_status": "pending",
+                "notes": "Initial registration",
+            }
+        )
+
+        response_data = {
+            "success": True,
+            "message": "Vehicle registration accepted",
+            "status": vehicle.registration_state,
+            "status_url": f"/api/vehicle/register/status/{vehicle.id}",
+            "vehicle": {
+                "id": vehicle.id,
+                "chassis_number": vehicle.chassis_number,
+                "region_code": vehicle.region_code,
+                "plate_sequence": vehicle.plate_sequence,
+                "unique_plate_number": vehicle.unique_plate_number,
+            },
+            "documents_count": len(staged_documents),
+        }
+
+        return request.make_response(
+            json.dumps(response_data),
+            headers=[("Content-Type", "application/json")],
+            status=202,
+        )
+
+    @http.route(
+        "/api/vehicle/register/status/<int:vehicle_id>",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+    )
+    def get_registration_status(self, vehicle_id, **kwargs):
+        """Progress of an async registration"""
+        try:
+            vehicle = request.env["vehicle.registration"].sudo().browse(vehicle_id)
+
+            if not vehicle.exists():
+                return self._error_response("Vehicle not found", 404)
+
             data = {
                 "success": True,
+                "status": vehicle.registration_state,
                 "vehicle": {
                     "id": vehicle.id,
                     "chassis_number": vehicle.chassis_number,
-                    "driver_name": vehicle.driver_name,
-                    "driver_address": vehicle.driver_address,
-                    "tax_number": vehicle.tax_number,
-                    "brand": vehicle.brand,
-                    "vehicle_type": vehicle.vehicle_type,
-                    "manufacturing_year": vehicle.manufacturing_year,
-                    "color": vehicle.color,
-                    "fiscal_power": vehicle.fiscal_power,
-                    "reference_number": vehicle.reference_number,
-                    "first_registration": vehicle.first_registration,
-                    "usage": vehicle.usage,
                     "plate_sequence": vehicle.plate_sequence,
                     "unique_plate_number": vehicle.unique_plate_number,
-                    "region_code": vehicle.region_code,
                     "qr_code_data": vehicle.qr_code_data,
-                    "print_date": (
-                        vehicle.print_date.isoformat() if vehicle.print_date else None
-                    ),
-                    "is_reprinted": vehicle.is_reprinted,
                 },
-                "documents": documents,
-                "print_history": print_history,
-                "counts": {"documents": len(documents), "prints": len(print_history)},
+                "stages": [
+                    {
+                        "stage": task.stage,
+                        "state": task.state,
+                        "attempts": task.attempt_count,
+                        "error": task.error_message,
+                    }
+                    for task in vehicle.registration_task_ids
+                ],
+                "documents": [
+                    {
+                        "id": doc.id,
+                        "name": doc.document_name,
+                        "type": doc.document_type,
+                        "filename": doc.file_name,
+                    }
+                    for doc in vehicle.document_ids
+                ],
             }
 
             return request.make_response(
@@ -243,23 +544,209 @@ class VehicleRegistrationController(http.Controller):
         except Exception as e:
             return self._error_response(str(e), 500)
 
-    def _create_or_update_vehicle(self, chassis_number, create_new=True):
-        """Create new vehicle or update existing one"""
+    def _prepare_vehicle_vals(self, params):
+        """Map registration form/row fields to vehicle.registration values"""
+        vehicle_data = {
+            "chassis_number": params.get("chassis_number"),
+            "driver_name": params.get("driver_name"),
+            "driver_address": params.get("driver_address"),
+            "tax_number": params.get("tax_number"),
+            "brand": params.get("brand"),
+            "vehicle_type": params.get("vehicle_type"),
+            "manufacturing_year": int(params.get("manufacturing_year") or 0) or None,
+            "color": params.get("color"),
+            "fiscal_power": int(params.get("fiscal_power") or 0) or None,
+            "reference_number": params.get("reference_number"),
+            "first_registration": int(params.get("first_registration") or 0) or None,
+            "usage": params.get("usage"),
+            "region_code": params.get("region_code"),
+        }
+
+        # Remove None values
+        return {k: v for k, v in vehicle_data.items() if v is not None}
+
+    @http.route(
+        "/api/vehicle/register/bulk",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def register_vehicles_bulk(self, **kwargs):
+        """
+        Bulk vehicle registration from an NDJSON or CSV request body
+        Rows are read from the stream and committed in chunks; per-row results
+        are streamed back as NDJSON followed by a summary line
+        """
+        fmt = kwargs.get("format")
+        if not fmt:
+            fmt = "csv" if request.httprequest.mimetype in CSV_MIMETYPES else "ndjson"
+        if fmt not in ("ndjson", "csv"):
+            return self._error_response(f"Unsupported format: {fmt}", 400)
+
+        chunk_size = self._safe_int(kwargs.get("chunk_size")) or BULK_CHUNK_SIZE
+        if chunk_size < 1:
+            return self._error_response("chunk_size must be a positive integer", 400)
+        chunk_size = min(chunk_size, BULK_MAX_CHUNK_SIZE)
+        printer_name = kwargs.get("printer_name", "Default")
+        rows = self._iter_bulk_rows(request.httprequest.stream, fmt)
+
+        # The body is consumed after this method returns, so every chunk runs
+        # in its own cursor and is committed before its results are sent
+        registry = request.env.registry
+        uid = request.env.uid
+
+        def generate():
+            summary = {"rows": 0, "created": 0, "failed": 0}
+            try:
+                for chunk in split_every(chunk_size, enumerate(rows, start=1)):
+                    with registry.cursor() as cr:
+                        env = api.Environment(cr, uid, {}, su=True)
+                        results = self._register_chunk(env, chunk, printer_name)
+                    for result in results:
+                        summary["rows"] += 1
+                        summary["created" if result["success"] else "failed"] += 1
+                        yield json.dumps(result) + "\n"
+            except Exception as e:
+                _logger.exception("Bulk registration aborted")
+                summary["error"] = f"Bulk registration aborted: {str(e)}"
+            yield json.dumps({"summary": summary}) + "\n"
+
+        return request.make_response(
+            generate(), headers=[("Content-Type", "application/x-ndjson")]
+        )
+
+    def _iter_bulk_rows(self, stream, fmt):
+        """Yield (params, error) for each row of an NDJSON or CSV stream"""
+        if fmt == "csv":
+            for params in csv.DictReader(codecs.iterdecode(stream, "utf-8-sig")):
+                yield params, None
+            return
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                params = json.loads(line)
+            except ValueError as ve:
+                yield {}, f"Invalid JSON: {str(ve)}"
+                continue
+            if not isinstance(params, dict):
+                yield {}, "Invalid JSON: expected an object"
+                continue
+            yield params, None
+
+    def _register_chunk(self, env, chunk, printer_name):
+        """Create one chunk of bulk rows and return their per-row results"""
+        results = []
+        valid_rows = []
+        for row_number, (params, error) in chunk:
+            if not error and not params.get("chassis_number"):
+                error = "Chassis number is required"
+            if not error and not params.get("region_code"):
+                error = "Region code is required"
+            if not error:
+                try:
+                    valid_rows.append((row_number, self._prepare_vehicle_vals(params)))
+                    continue
+                except (ValueError, TypeError, AttributeError) as ve:
+                    # A wrongly typed JSON value only fails its own row
+                    error = f"Invalid data: {str(ve)}"
+            results.append(
+                {
+                    "row": row_number,
+                    "success": False,
+                    "chassis_number": params.get("chassis_number"),
+                    "error": error,
+                }
+            )
+
+        Vehicle = env["vehicle.registration"]
         try:
-            # Check if vehicle exists
-            existing_vehicle = (
-                request.env["vehicle.registration"]
-                .sudo()
-                .search([("chassis_number", "=", chassis_number)], limit=1)
+            with env.cr.savepoint():
+                vehicles = Vehicle.create([vals for _, vals in valid_rows])
+            created = list(zip([row for row, _ in valid_rows], vehicles))
+        except Exception:
+            # Fall back to row by row creation to find the offending rows
+            created = []
+            for row_number, vals in valid_rows:
+                try:
+                    with env.cr.savepoint():
+                        created.append((row_number, Vehicle.create(vals)))
+                except pg_errors.UniqueViolation as e:
+                    if e.diag.constraint_name != CHASSIS_UNIQUE_CONSTRAINT:
+                        raise
+                    results.append(
+                        {
+                            "row": row_number,
+                            "success": False,
+                            "chassis_number": vals.get("chassis_number"),
+                            "error": "Chassis number already exists",
+                        }
+                    )
+                except Exception as e:
+                    results.append(
+                        {
+                            "row": row_number,
+                            "success": False,
+                            "chassis_number": vals.get("chassis_number"),
+                            "error": f"Registration failed: {str(e)}",
+                        }
+                    )
+
+        vehicles = Vehicle.browse([vehicle.id for _, vehicle in created])
+        vehicles.generate_qr_code()
+        env["vehicle.print.history"].create(
+            [
+                {
+                    "vehicle_id": vehicle.id,
+                    "print_type": "license_plate",
+                    "printer_name": printer_name,
+                    "print_status": "pending",
+                    "notes": "Bulk registration",
+                }
+                for vehicle in vehicles
+            ]
+        )
+
+        for row_number, vehicle in created:
+            results.append(
+                {
+                    "row": row_number,
+                    "success": True,
+                    "id": vehicle.id,
+                    "chassis_number": vehicle.chassis_number,
+                    "plate_sequence": vehicle.plate_sequence,
+                    "unique_plate_number": vehicle.unique_plate_number,
+                }
             )
+        results.sort(key=lambda result: result["row"])
+        return results
 
-            if create_new and existing_vehicle:
-                return self._error_response(
-                    f"Vehicle with chassis number {chassis_number} already exists", 409
-                )
+    def _create_vehicle(self, vals):
+        """Create a vehicle, or return None if its chassis is already registered"""
+        Vehicle = request.env["vehicle.registration"].sudo()
+        if Vehicle._find_registered_chassis([vals["chassis_number"]]):
+            return None
+        try:
+            with request.env.cr.savepoint():
+                return Vehicle.create(vals)
+        except pg_errors.UniqueViolation as e:
+            if e.diag.constraint_name != CHASSIS_UNIQUE_CONSTRAINT:
+                raise
+            return None
 
-            if not create_new and not existing_vehicle:
-                return self._error_response("Vehicle not found for update", 404)
+    def _create_or_update_vehicle(self, chassis_number, create_new=True):
+        """Create new vehicle or update existing one"""
+        try:
+            if not create_new:
+                existing_vehicle = (
+                    request.env["vehicle.registration"]
+                    .sudo()
+                    ._search_by_chassis(chassis_number)
+                )
+                if not existing_vehicle:
+                    return self._error_response("Vehicle not found for update", 404)
 
             # Get form data
             vehicle_data = {
@@ -286,9 +773,12 @@ class VehicleRegistrationController(http.Controller):
             vehicle_data = {k: v for k, v in vehicle_data.items() if v is not None}
 
             if create_new:
-                vehicle = (
-                    request.env["vehicle.registration"].sudo().create(vehicle_data)
-                )
+                vehicle = self._create_vehicle(vehicle_data)
+                if not vehicle:
+                    return self._error_response(
+                        f"Vehicle with chassis number {chassis_number} already exists",
+                        409,
+                    )
                 action = "created"
             else:
                 existing_vehicle.sudo().write(vehicle_data)
@@ -299,42 +789,9 @@ class VehicleRegistrationController(http.Controller):
             vehicle.generate_qr_code()
 
             # Handle document uploads
-            uploaded_documents = []
-            files = request.httprequest.files
-
-            for file_key in files:
-                uploaded_file = files[file_key]
-                if uploaded_file and uploaded_file.filename:
-
-                    # Get document metadata from form
-                    doc_type = request.params.get(f"{file_key}_type", "other")
-                    doc_name = request.params.get(
-                        f"{file_key}_name", uploaded_file.filename
-                    )
-
-                    # Create document record
-                    document = (
-                        request.env["vehicle.document"]
-                        .sudo()
-                        .create(
-                            {
-                                "vehicle_id": vehicle.id,
-                                "document_name": doc_name,
-                                "document_type": doc_type,
-                                "document_file": base64.b64encode(uploaded_file.read()),
-                                "file_name": uploaded_file.filename,
-                            }
-                        )
-                    )
-
-                    uploaded_documents.append(
-                        {
-                            "id": document.id,
-                            "name": doc_name,
-                            "type": doc_type,
-                            "filename": uploaded_file.filename,
-                        }
-                    )
+            uploaded_documents = self._create_uploaded_documents(
+                vehicle, request.params
+            )
 
             # Create print history if new registration
             if create_new:
@@ -390,12 +847,20 @@ class VehicleRegistrationController(http.Controller):
         csrf=False,
     )
     def reprint_vehicle_by_chassis(self, chassis_number, **kwargs):
-        """Trigger reprint using chassis number instead of vehicle ID"""
+        """Trigger reprint using chassis number instead of vehicle ID
+
+        Retries carrying the same Idempotency-Key header get the first response
+        """
+        return self._idempotent(
+            lambda: self._reprint_vehicle_by_chassis(chassis_number, **kwargs)
+        )
+
+    def _reprint_vehicle_by_chassis(self, chassis_number, **kwargs):
         try:
             vehicle = (
                 request.env["vehicle.registration"]
                 .sudo()
-                .search([("chassis_number", "=", chassis_number)], limit=1)
+                ._search_by_chassis(chassis_number)
             )
 
             if not vehicle:
@@ -404,15 +869,12 @@ class VehicleRegistrationController(http.Controller):
             # Mark as reprinted
             vehicle.sudo().write({"is_reprinted": True})
 
-            # Create print history record
-            request.env["vehicle.print.history"].sudo().create(
-                {
-                    "vehicle_id": vehicle.id,
-                    "print_type": "reprint",
-                    "printer_name": request.params.get("printer_name", "Unknown"),
-                    "print_status": "pending",
-                    "notes": "Reprint requested",
-                }
+            # Queue the reprint, on the configured default printer unless the
+            # caller names one
+            vehicle._enqueue_print(
+                print_type="reprint",
+                printer_name=request.params.get("printer_name"),
+                notes="Reprint requested",
             )
 
             data = {
@@ -444,80 +906,218 @@ class VehicleRegistrationController(http.Controller):
         csrf=False,
     )
     def search_vehicles(self, **kwargs):
-        """Search vehicles with multiple criteria"""
-        try:
-            domain = []
-
-            # Search by chassis number (exact or partial)
-            if kwargs.get("chassis_number"):
-                chassis = kwargs.get("chassis_number")
-                if kwargs.get("exact_match", "false").lower() == "true":
-                    domain.append(("chassis_number", "=", chassis))
-                else:
-                    domain.append(("chassis_number", "ilike", chassis))
+        """Search vehicles with multiple criteria
 
-            # Search by driver name
-            if kwargs.get("driver_name"):
-                domain.append(("driver_name", "ilike", kwargs.get("driver_name")))
-
-            # Filter by region
-            if kwargs.get("region_code"):
-                domain.append(("region_code", "=", kwargs.get("region_code")))
+        Results are ordered by creation date, newest first. Pass the
+        next_cursor of a page as cursor= to get the following one, which
+        costs the same at any depth (offset= is still accepted). total= is
+        "exact" (default), "estimate" (planner estimate) or "none".
 
-            # Filter by brand
-            if kwargs.get("brand"):
-                domain.append(("brand", "ilike", kwargs.get("brand")))
-
-            # Filter by plate sequence
-            if kwargs.get("plate_sequence"):
-                domain.append(("plate_sequence", "ilike", kwargs.get("plate_sequence")))
+        With q=, vehicles containing the text in their chassis, driver, brand
+        or plate are ranked by similarity instead, and paged with offset=.
+        """
+        try:
+            domain = self._build_search_domain(kwargs)
+            Vehicle = request.env["vehicle.registration"].sudo()
 
             # Pagination
             limit = int(kwargs.get("limit", 50))
             offset = int(kwargs.get("offset", 0))
+            total_mode = kwargs.get("total", "exact")
+            if total_mode not in SEARCH_TOTAL_MODES:
+                return self._error_response(
+                    f"total must be one of {', '.join(SEARCH_TOTAL_MODES)}", 400
+                )
 
-            vehicles = (
-                request.env["vehicle.registration"]
+            page_domain = domain
+            if kwargs.get("cursor"):
+                try:
+                    create_date, last_id = self._decode_search_cursor(kwargs["cursor"])
+                except ValueError:
+                    return self._error_response("Invalid cursor", 400)
+                page_domain = domain + [
+                    "|",
+                    ("create_date", "<", create_date),
+                    "&",
+                    ("create_date", "=", create_date),
+                    ("id", "<", last_id),
+                ]
+                offset = 0
+
+            scores = {}
+            if kwargs.get("q"):
+                ranked = Vehicle._search_ranked(domain, kwargs["q"], limit, offset)
+                scores = dict(ranked)
+                rows = {
+                    row["id"]: row
+                    for row in Vehicle.search_read(
+                        [("id", "in", list(scores))],
+                        SEARCH_RESULT_FIELDS + ["create_date"],
+                        load=None,
+                    )
+                }
+                vehicles = [rows[vehicle_id] for vehicle_id, score in ranked]
+            else:
+                vehicles = Vehicle.search_read(
+                    page_domain,
+                    SEARCH_RESULT_FIELDS + ["create_date"],
+                    limit=limit,
+                    offset=offset,
+                    order="create_date desc, id desc",
+                    load=None,
+                )
+
+            # Document counts of the whole page in one grouped query
+            documents_count = {
+                vehicle.id: count
+                for vehicle, count in request.env["vehicle.document"]
                 .sudo()
-                .search(domain, limit=limit, offset=offset, order="create_date desc")
-            )
-            total_count = (
-                request.env["vehicle.registration"].sudo().search_count(domain)
-            )
+                ._read_group(
+                    [("vehicle_id", "in", [vehicle["id"] for vehicle in vehicles])],
+                    ["vehicle_id"],
+                    ["__count"],
+                )
+            }
 
             results = []
             for vehicle in vehicles:
-                results.append(
+                result = {
+                    name: self._json_value(vehicle[name]) for name in SEARCH_RESULT_FIELDS
+                }
+                result["documents_count"] = documents_count.get(vehicle["id"], 0)
+                if scores:
+                    result["score"] = round(scores[vehicle["id"]], 4)
+                results.append(result)
+
+            pagination = {
+                "limit": limit,
+                "offset": offset,
+                "returned": len(results),
+                "next_cursor": (
+                    self._encode_search_cursor(vehicles[-1])
+                    if vehicles and len(vehicles) == limit and not scores
+                    else None
+                ),
+            }
+            if total_mode == "exact":
+                pagination["total"] = Vehicle.search_count(domain)
+            elif total_mode == "estimate":
+                pagination["total"] = Vehicle._estimate_count(domain)
+                pagination["total_is_estimate"] = True
+
+            return request.make_response(
+                json.dumps(
                     {
-                        "id": vehicle.id,
-                        "chassis_number": vehicle.chassis_number,
-                        "driver_name": vehicle.driver_name,
-                        "brand": vehicle.brand,
-                        "vehicle_type": vehicle.vehicle_type,
-                        "plate_sequence": vehicle.plate_sequence,
-                        "unique_plate_number": vehicle.unique_plate_number,
-                        "region_code": vehicle.region_code,
-                        "print_date": (
-                            vehicle.print_date.isoformat()
-                            if vehicle.print_date
-                            else None
-                        ),
-                        "is_reprinted": vehicle.is_reprinted,
-                        "documents_count": len(vehicle.document_ids),
+                        "success": True,
+                        "vehicles": results,
+                        "pagination": pagination,
                     }
+                ),
+                headers=[("Content-Type", "application/json")],
+            )
+
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    def _encode_search_cursor(self, vehicle):
+        """Opaque cursor pointing after the given search_read row"""
+        key = json.dumps([vehicle["create_date"].isoformat(), vehicle["id"]])
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    def _decode_search_cursor(self, cursor):
+        """(create_date, id) of a cursor, ValueError when it is malformed"""
+        try:
+            create_date, last_id = json.loads(base64.urlsafe_b64decode(cursor))
+            return datetime.fromisoformat(create_date), int(last_id)
+        except TypeError as e:
+            raise ValueError(str(e)) from e
+
+    @http.route(
+        "/api/vehicle/stats",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+    )
+    def get_stats(self, **kwargs):
+        """
+        Registry statistics for dashboards
+        Registrations and reprint rates per region, daily registrations and
+        print success ratios per printer between date_from and date_to
+        (YYYY-MM-DD, default: the last 30 days), read from the precomputed
+        aggregates refreshed every few minutes
+        """
+        try:
+            try:
+                date_to = fields.Date.to_date(kwargs.get("date_to")) or fields.Date.today()
+                date_from = fields.Date.to_date(kwargs.get("date_from")) or (
+                    date_to - timedelta(days=STATS_DEFAULT_DAYS - 1)
                 )
+            except ValueError:
+                return self._error_response("Dates must be formatted YYYY-MM-DD", 400)
+
+            period = [("day", ">=", date_from), ("day", "<=", date_to)]
+            region_domain = list(period)
+            if kwargs.get("region_code"):
+                region_domain.append(("region_code", "=", kwargs["region_code"]))
+            printer_domain = list(period)
+            if kwargs.get("printer_name"):
+                printer_domain.append(("printer_name", "=", kwargs["printer_name"]))
+
+            RegistrationStats = request.env["vehicle.registration.stats"].sudo()
+            PrinterStats = request.env["vehicle.printer.stats"].sudo()
+
+            regions = [
+                {
+                    "region_code": region_code,
+                    "registrations": registrations,
+                    "reprinted": reprinted,
+                    "reprint_rate": (
+                        round(reprinted / registrations, 4) if registrations else 0
+                    ),
+                }
+                for region_code, registrations, reprinted in RegistrationStats._read_group(
+                    region_domain,
+                    ["region_code"],
+                    ["registrations:sum", "reprinted:sum"],
+                    order="region_code",
+                )
+            ]
+            daily = [
+                {"day": day.isoformat(), "registrations": registrations}
+                for day, registrations in RegistrationStats._read_group(
+                    region_domain, ["day:day"], ["registrations:sum"], order="day:day"
+                )
+            ]
+            printers = [
+                {
+                    "printer_name": printer_name,
+                    "prints": prints,
+                    "succeeded": succeeded,
+                    "failed": failed,
+                    "success_ratio": round(succeeded / prints, 4) if prints else 0,
+                }
+                for printer_name, prints, succeeded, failed in PrinterStats._read_group(
+                    printer_domain,
+                    ["printer_name"],
+                    ["prints:sum", "succeeded:sum", "failed:sum"],
+                    order="printer_name",
+                )
+            ]
 
             return request.make_response(
                 json.dumps(
                     {
                         "success": True,
-                        "vehicles": results,
-                        "pagination": {
-                            "total": total_count,
-                            "limit": limit,
-                            "offset": offset,
-                            "returned": len(results),
-                        },
+                        "date_from": date_from.isoformat(),
+                        "date_to": date_to.isoformat(),
+                        "refreshed_at": self._json_value(
+                            RegistrationStats._get_refreshed_at()
+                            or PrinterStats._get_refreshed_at()
+                        ),
+                        "regions": regions,
+                        "daily": daily,
+                        "printers": printers,
                     }
                 ),
                 headers=[("Content-Type", "application/json")],
@@ -526,6 +1126,134 @@ class VehicleRegistrationController(http.Controller):
         except Exception as e:
             return self._error_response(str(e), 500)
 
+    @http.route(
+        "/api/vehicle/export",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+    )
+    def export_vehicles(self, **kwargs):
+        """
+        Stream the registry, or the vehicles matching the search_vehicles
+        criteria, as NDJSON (default) or CSV with their documents metadata
+        fields: comma separated fields (default: every stored non binary
+        field); include_binary=1 adds the binary ones; documents=0 skips the
+        documents metadata
+        """
+        fmt = kwargs.get("format", "ndjson")
+        if fmt not in EXPORT_FORMATS:
+            return self._error_response(f"Unsupported format: {fmt}", 400)
+
+        Vehicle = request.env["vehicle.registration"].sudo()
+        try:
+            fnames = Vehicle._get_export_fields(
+                self._get_list_param(kwargs, "fields", []),
+                with_binary=kwargs.get("include_binary") in ("1", "true"),
+            )
+        except ValueError as ve:
+            return self._error_response(str(ve), 400)
+        with_documents = kwargs.get("documents", "1") not in ("0", "false")
+        domain = self._build_search_domain(kwargs)
+        chunk_size = self._safe_int(kwargs.get("chunk_size")) or EXPORT_CHUNK_SIZE
+        if chunk_size < 1:
+            return self._error_response("chunk_size must be a positive integer", 400)
+        chunk_size = min(chunk_size, EXPORT_MAX_CHUNK_SIZE)
+        columns = fnames + (["documents"] if with_documents else [])
+
+        # The response is consumed after this method returns: every chunk is
+        # read with its own cursor, and only one chunk is held in memory
+        registry = request.env.registry
+        uid = request.env.uid
+
+        def generate():
+            if fmt == "csv":
+                yield self._csv_line(columns)
+            after_id = 0
+            try:
+                while True:
+                    with registry.cursor() as cr:
+                        env = api.Environment(cr, uid, {}, su=True)
+                        rows = env["vehicle.registration"]._get_export_chunk(
+                            domain, fnames, after_id, chunk_size, with_documents
+                        )
+                    if not rows:
+                        break
+                    if fmt == "csv":
+                        yield "".join(
+                            self._csv_line(
+                                [
+                                    json.dumps(row[column])
+                                    if isinstance(row[column], list)
+                                    else row[column]
+                                    for column in columns
+                                ]
+                            )
+                            for row in rows
+                        )
+                    else:
+                        yield "".join(json.dumps(row) + "\n" for row in rows)
+                    after_id = rows[-1]["id"]
+            except Exception:
+                # Headers are already sent, a truncated body is all we can do
+                _logger.exception("Registry export aborted")
+                raise
+
+        return request.make_response(
+            generate(),
+            headers=[
+                ("Content-Type", EXPORT_FORMATS[fmt]),
+                (
+                    "Content-Disposition",
+                    f'attachment; filename="vehicle_registry.{fmt}"',
+                ),
+            ],
+        )
+
+    def _csv_line(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
+
+    def _build_search_domain(self, params):
+        """Build a vehicle.registration domain from search criteria"""
+        domain = []
+
+        # Free text in any of chassis, driver, brand or plate
+        if params.get("q"):
+            domain += (
+                request.env["vehicle.registration"]._get_text_search_domain(params["q"])
+            )
+
+        # Search by chassis number (exact or partial)
+        if params.get("chassis_number"):
+            chassis = params.get("chassis_number")
+            if params.get("exact_match", "false").lower() == "true":
+                chassis_key = request.env["vehicle.registration"]._normalize_chassis(
+                    chassis
+                )
+                domain.append(("chassis_key", "=", chassis_key))
+            else:
+                domain.append(("chassis_number", "ilike", chassis))
+
+        # Search by driver name
+        if params.get("driver_name"):
+            domain.append(("driver_name", "ilike", params.get("driver_name")))
+
+        # Filter by region
+        if params.get("region_code"):
+            domain.append(("region_code", "=", params.get("region_code")))
+
+        # Filter by brand
+        if params.get("brand"):
+            domain.append(("brand", "ilike", params.get("brand")))
+
+        # Filter by plate sequence
+        if params.get("plate_sequence"):
+            domain.append(("plate_sequence", "ilike", params.get("plate_sequence")))
+
+        return domain
+
     @http.route(
         "/api/vehicle/document/<int:document_id>/download",
         type="http",
@@ -534,31 +1262,152 @@ class VehicleRegistrationController(http.Controller):
         csrf=False,
     )
     def download_document(self, document_id, **kwargs):
-        """Download a specific document"""
+        """Download a specific document
+
+        The file is streamed from the filestore (or handed over to the proxy
+        with X-Sendfile) with Range, ETag and Last-Modified support, so
+        interrupted downloads can resume and unchanged documents answer 304.
+        """
         try:
             document = request.env["vehicle.document"].sudo().browse(document_id)
 
             if not document.exists():
                 return self._error_response("Document not found", 404)
 
-            # Decode the file
-            file_data = base64.b64decode(document.document_file)
+            stream = (
+                request.env["ir.binary"]
+                .sudo()
+                ._get_stream_from(
+                    document,
+                    "document_file",
+                    filename=document.file_name or document.document_name,
+                    mimetype=document.mimetype or None,
+                )
+            )
+            if document.checksum:
+                stream.etag = document.checksum
+
+            return stream.get_response(as_attachment=True)
+
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    @http.route(
+        "/api/vehicle/qr/decode",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def decode_qr_payload(self, **kwargs):
+        """Decode a scanned QR payload and verify its signature"""
+        try:
+            payload = kwargs.get("payload") or request.httprequest.get_data(
+                as_text=True
+            )
+            if not payload:
+                return self._error_response("QR payload is required", 400)
+
+            decoded = (
+                request.env["vehicle.registration"].sudo()._decode_qr_payload(payload)
+            )
 
-            # Return file response
             return request.make_response(
-                file_data,
-                headers=[
-                    ("Content-Type", "application/octet-stream"),
-                    (
-                        "Content-Disposition",
-                        f'attachment; filename="{document.file_name}"',
-                    ),
-                ],
+                json.dumps({"success": True, "qr": decoded}),
+                headers=[("Content-Type", "application/json")],
+            )
+
+        except ValidationError as ve:
+            return self._error_response(str(ve), 400)
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    @http.route(
+        "/api/vehicle/qr/verify",
+        type="http",
+        auth="public",
+        methods=["GET", "POST"],
+        csrf=False,
+    )
+    def verify_qr_payload(self, **kwargs):
+        """Fast roadside verification of a scanned carte rose QR code"""
+        try:
+            payload = kwargs.get("payload") or request.httprequest.get_data(
+                as_text=True
+            )
+            if not payload:
+                return self._error_response("QR payload is required", 400)
+
+            result = (
+                request.env["vehicle.registration"].sudo()._verify_qr_payload(payload)
+            )
+            result["success"] = True
+
+            return request.make_response(
+                json.dumps(result), headers=[("Content-Type", "application/json")]
             )
 
+        except ValidationError as ve:
+            return self._error_response(str(ve), 400)
         except Exception as e:
             return self._error_response(str(e), 500)
 
+    def _idempotent(self, handler):
+        """Run handler once per Idempotency-Key header and endpoint
+
+        Later requests with the same key replay the stored response with an
+        Idempotent-Replayed header, or get 422 if their parameters differ.
+        Server errors are not stored: their transaction is rolled back so the
+        request can be retried with the same key.
+        """
+        key = request.httprequest.headers.get("Idempotency-Key")
+        if not key:
+            return handler()
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return self._error_response("Idempotency-Key is too long", 400)
+
+        Idempotency = request.env["vehicle.idempotency.key"].sudo()
+        endpoint = request.httprequest.path
+        request_hash = self._get_request_hash()
+        stored = Idempotency._reserve(endpoint, key, request_hash)
+        if stored:
+            if stored["request_hash"] != request_hash:
+                return self._error_response(
+                    "Idempotency-Key was already used with other parameters", 422
+                )
+            if not stored["status_code"]:
+                return self._error_response(
+                    "A request with this Idempotency-Key is in progress", 409
+                )
+            return request.make_response(
+                stored["body"],
+                headers=[
+                    ("Content-Type", stored["content_type"] or "application/json"),
+                    ("Idempotent-Replayed", "true"),
+                ],
+                status=stored["status_code"],
+            )
+
+        response = handler()
+        if response.status_code >= 500:
+            request.env.cr.rollback()
+        else:
+            Idempotency._store_response(endpoint, key, request_hash, response)
+        return response
+
+    def _get_request_hash(self):
+        """Fingerprint of the method, path and parameters of the request"""
+        params = {
+            name: value.filename if hasattr(value, "filename") else value
+            for name, value in request.params.items()
+        }
+        fingerprint = json.dumps(
+            [request.httprequest.method, request.httprequest.path, params],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
     def _error_response(self, message, status_code):
         """Helper method to create consistent error responses"""
         return request.make_response(
@@ -590,29 +1439,29 @@ class VehicleRegistrationController(http.Controller):
             vehicle = (
                 request.env["vehicle.registration"]
                 .sudo()
-                .search([("chassis_number", "=", chassis_number)], limit=1)
+                ._search_by_chassis(chassis_number)
             )
 
             if not vehicle:
                 return self._error_response("Vehicle not found", 404)
 
             # Generate QR code if not exists
-            if not vehicle.qr_code_image:
+            if not vehicle.with_context(bin_size=True).qr_code_image:
                 vehicle.generate_qr_code()
 
-            # Generate PDF
-            report = request.env.ref("rdc_printer.action_report_carte_rose").sudo()
-            pdf, _ = report._render_qweb_pdf([vehicle.id])
+            # Generate PDF (reused while the printed fields are unchanged)
+            pdf = vehicle._get_carte_rose_pdf()
 
-            # Create print history
-            request.env["vehicle.print.history"].sudo().create(
-                {
-                    "vehicle_id": vehicle.id,
-                    "print_type": "carte_rose",
-                    "printer_name": "Authentys Pro RT1",
-                    "print_status": "success",
-                    "notes": "Carte Rose generated via API",
-                }
+            # Log the print
+            request.env["vehicle.print.log"].sudo()._log(
+                [
+                    {
+                        "vehicle_id": vehicle.id,
+                        "print_type": "carte_rose",
+                        "printer_name": vehicle._get_default_printer(),
+                        "notes": "Carte Rose generated via API",
+                    }
+                ]
             )
 
             return request.make_response(
@@ -628,3 +1477,434 @@ class VehicleRegistrationController(http.Controller):
 
         except Exception as e:
             return self._error_response(str(e), 500)
+
+    @http.route(
+        "/api/vehicle/carte_rose/batch",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def print_carte_rose_batch(self, **kwargs):
+        """
+        Print the carte rose of many vehicles as one PDF
+        Vehicles are given as chassis_numbers (JSON body or comma separated)
+        or selected with the search_vehicles criteria; layout is "card" (one
+        card side per page) or "sheet" (A4 sheets of 10 cards)
+        """
+        try:
+            layout = kwargs.get("layout", "card")
+            if layout not in ("card", "sheet"):
+                return self._error_response(f"Unsupported layout: {layout}", 400)
+
+            try:
+                chassis_numbers = self._get_chassis_numbers_param(kwargs)
+            except ValueError as ve:
+                return self._error_response(str(ve), 400)
+            if chassis_numbers:
+                normalize = request.env["vehicle.registration"]._normalize_chassis
+                domain = [("chassis_key", "in", [normalize(c) for c in chassis_numbers])]
+            else:
+                domain = self._build_search_domain(kwargs)
+            if not domain:
+                return self._error_response(
+                    "chassis_numbers or search criteria are required", 400
+                )
+
+            vehicles = (
+                request.env["vehicle.registration"]
+                .sudo()
+                .search(domain, limit=BATCH_PRINT_MAX + 1, order="id")
+            )
+            if not vehicles:
+                return self._error_response("No vehicle found", 404)
+            if len(vehicles) > BATCH_PRINT_MAX:
+                return self._error_response(
+                    f"Too many vehicles, at most {BATCH_PRINT_MAX} per batch", 400
+                )
+
+            pdf = vehicles._print_carte_rose_batch(
+                layout=layout,
+                printer_name=kwargs.get("printer_name"),
+                notes="Carte Rose batch generated via API",
+            )
+
+            return request.make_response(
+                pdf,
+                headers=[
+                    ("Content-Type", "application/pdf"),
+                    (
+                        "Content-Disposition",
+                        f'attachment; filename="carte_rose_batch_{len(vehicles)}.pdf"',
+                    ),
+                ],
+            )
+
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    def _get_chassis_numbers_param(self, params):
+        """Chassis numbers from a JSON body or a comma separated parameter"""
+        return self._get_values_param(params, "chassis_numbers")
+
+    def _get_values_param(self, params, name):
+        """List of values from a JSON body or a comma separated parameter
+
+        Raises ValueError when the JSON body is malformed or the value is not
+        a list of strings.
+        """
+        if params.get(name):
+            return [v.strip() for v in params[name].split(",") if v.strip()]
+        if request.httprequest.mimetype == "application/json":
+            try:
+                body = json.loads(request.httprequest.get_data(as_text=True) or "{}")
+                values = body.get(name) or []
+            except (ValueError, AttributeError):
+                raise ValueError("Invalid JSON body, expected an object") from None
+            if not isinstance(values, list) or not all(
+                isinstance(v, str) for v in values
+            ):
+                raise ValueError(f"{name} must be a list of strings")
+            return [v.strip() for v in values if v.strip()]
+        return []
+
+    @http.route(
+        "/api/vehicle/lookup",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def lookup_vehicles(self, **kwargs):
+        """
+        Resolve many chassis numbers and/or plate sequences at once
+        Keys are given as chassis_numbers and plate_sequences (JSON body or
+        comma separated); found vehicles are returned keyed by the value
+        they were looked up with, missing keys are listed in not_found
+        """
+        try:
+            try:
+                chassis_numbers = list(
+                    dict.fromkeys(self._get_chassis_numbers_param(kwargs))
+                )
+                plate_sequences = list(
+                    dict.fromkeys(self._get_values_param(kwargs, "plate_sequences"))
+                )
+            except ValueError as ve:
+                return self._error_response(str(ve), 400)
+            if not chassis_numbers and not plate_sequences:
+                return self._error_response(
+                    "chassis_numbers or plate_sequences are required", 400
+                )
+            if len(chassis_numbers) + len(plate_sequences) > LOOKUP_MAX:
+                return self._error_response(
+                    f"Too many keys, at most {LOOKUP_MAX} per lookup", 400
+                )
+
+            Vehicle = request.env["vehicle.registration"].sudo()
+            chassis_keys = {
+                chassis: Vehicle._normalize_chassis(chassis) for chassis in chassis_numbers
+            }
+            domains = []
+            if chassis_numbers:
+                domains.append([("chassis_key", "in", list(chassis_keys.values()))])
+            if plate_sequences:
+                domains.append([("plate_sequence", "in", plate_sequences)])
+            domain = expression.OR(domains)
+            vehicles = Vehicle.search_read(
+                domain, LOOKUP_FIELDS + ["chassis_key"], load=None
+            )
+
+            by_chassis = {}
+            by_plate = {}
+            for vehicle in vehicles:
+                data = {name: self._json_value(vehicle[name]) for name in LOOKUP_FIELDS}
+                by_chassis[vehicle["chassis_key"]] = data
+                if vehicle["plate_sequence"]:
+                    by_plate[vehicle["plate_sequence"]] = data
+
+            return request.make_response(
+                json.dumps(
+                    {
+                        "success": True,
+                        "chassis_numbers": {
+                            chassis: by_chassis[chassis_keys[chassis]]
+                            for chassis in chassis_numbers
+                            if chassis_keys[chassis] in by_chassis
+                        },
+                        "plate_sequences": {
+                            plate: by_plate[plate]
+                            for plate in plate_sequences
+                            if plate in by_plate
+                        },
+                        "not_found": {
+                            "chassis_numbers": [
+                                chassis
+                                for chassis in chassis_numbers
+                                if chassis_keys[chassis] not in by_chassis
+                            ],
+                            "plate_sequences": [
+                                plate for plate in plate_sequences if plate not in by_plate
+                            ],
+                        },
+                    }
+                ),
+                headers=[("Content-Type", "application/json")],
+            )
+
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    @http.route(
+        "/api/vehicle/changes",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+    )
+    def get_changes(self, **kwargs):
+        """
+        Change feed for offline copies of the registry
+        Streams as NDJSON the vehicles, document metadata, print jobs and
+        printed cards changed since the given cursor, then the deleted
+        records; a "cursor" line follows every chunk, the last one is where
+        the next sync starts
+        """
+        try:
+            position = self._decode_changes_cursor(kwargs.get("cursor"))
+        except ValueError:
+            return self._error_response("Invalid cursor", 400)
+
+        Tombstone = request.env["vehicle.sync.tombstone"].sudo()
+        # Cursors emitted before the deleted feed was reached carry no position
+        # for it; the deletions they miss go back to their oldest position
+        deleted_since = position.get("deleted") or min(position.values(), default=None)
+        if deleted_since and deleted_since[0] < Tombstone._get_history_start():
+            return self._error_response(
+                "Cursor is older than the deletion history, a full sync is required",
+                410,
+            )
+
+        chunk_size = self._safe_int(kwargs.get("chunk_size")) or SYNC_CHUNK_SIZE
+        if chunk_size < 1:
+            return self._error_response("chunk_size must be a positive integer", 400)
+        chunk_size = min(chunk_size, SYNC_MAX_CHUNK_SIZE)
+        # Rows stamped by transactions that may still be running are left for
+        # the next sync, so the cursor never skips over them
+        until = Tombstone._get_sync_horizon()
+
+        # The response is consumed after this method returns, so the
+        # generator reads with its own cursor
+        registry = request.env.registry
+        uid = request.env.uid
+
+        def generate():
+            try:
+                for feed, model_name, date_field, fnames in SYNC_FEEDS:
+                    while True:
+                        with registry.cursor() as cr:
+                            env = api.Environment(cr, uid, {}, su=True)
+                            rows = self._fetch_changes(
+                                env[model_name],
+                                date_field,
+                                fnames,
+                                position.get(feed),
+                                until,
+                                chunk_size,
+                            )
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield json.dumps(
+                                {
+                                    "type": feed,
+                                    "data": {
+                                        name: self._json_value(row[name])
+                                        for name in fnames
+                                    },
+                                }
+                            ) + "\n"
+                        position[feed] = (rows[-1][date_field], rows[-1]["id"])
+                        yield json.dumps(
+                            {"type": "cursor", "cursor": self._encode_changes_cursor(position)}
+                        ) + "\n"
+                        if len(rows) < chunk_size:
+                            break
+                    # Everything before the horizon has been seen, so quiet
+                    # feeds move forward too
+                    position[feed] = max(position.get(feed) or (until, 0), (until, 0))
+            except Exception as e:
+                _logger.exception("Change feed aborted")
+                yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+                return
+            yield json.dumps(
+                {"type": "end", "cursor": self._encode_changes_cursor(position)}
+            ) + "\n"
+
+        return request.make_response(
+            generate(), headers=[("Content-Type", "application/x-ndjson")]
+        )
+
+    def _fetch_changes(self, model, date_field, fnames, position, until, limit):
+        """Next rows changed after position and before until, by (date, id)"""
+        domain = [(date_field, "<", until)]
+        if position:
+            change_date, last_id = position
+            domain += [
+                "|",
+                (date_field, ">", change_date),
+                "&",
+                (date_field, "=", change_date),
+                ("id", ">", last_id),
+            ]
+        return model.with_context(active_test=False).search_read(
+            domain, fnames, limit=limit, order=f"{date_field}, id", load=None
+        )
+
+    def _encode_changes_cursor(self, position):
+        """Opaque cursor holding the (change date, id) reached in every feed"""
+        key = json.dumps(
+            {
+                feed: [change_date.isoformat(), last_id]
+                for feed, (change_date, last_id) in position.items()
+            }
+        )
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    def _decode_changes_cursor(self, cursor):
+        """Feed positions of a cursor, ValueError when it is malformed"""
+        if not cursor:
+            return {}
+        try:
+            return {
+                feed: (datetime.fromisoformat(change_date), int(last_id))
+                for feed, (change_date, last_id) in json.loads(
+                    base64.urlsafe_b64decode(cursor)
+                ).items()
+            }
+        except (TypeError, AttributeError) as e:
+            raise ValueError(str(e)) from e
+
+    @http.route(
+        "/api/vehicle/print/<string:chassis_number>",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def enqueue_carte_rose_print(self, chassis_number, **kwargs):
+        """Queue a carte rose print job and return immediately with its id"""
+        return self._idempotent(
+            lambda: self._enqueue_carte_rose_print(chassis_number, **kwargs)
+        )
+
+    def _enqueue_carte_rose_print(self, chassis_number, **kwargs):
+        try:
+            vehicle = (
+                request.env["vehicle.registration"]
+                .sudo()
+                ._search_by_chassis(chassis_number)
+            )
+
+            if not vehicle:
+                return self._error_response("Vehicle not found", 404)
+
+            job = vehicle._enqueue_print(
+                printer_name=kwargs.get("printer_name"),
+                notes="Carte Rose queued via API",
+            )
+
+            return request.make_response(
+                json.dumps(
+                    {
+                        "success": True,
+                        "message": "Print job queued",
+                        "job": self._print_job_data(job),
+                        "status_url": f"/api/vehicle/print/job/{job.id}",
+                    }
+                ),
+                headers=[("Content-Type", "application/json")],
+                status=202,
+            )
+
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    @http.route(
+        "/api/vehicle/print/job/<int:job_id>",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+    )
+    def get_print_job(self, job_id, **kwargs):
+        """Status of a queued print job"""
+        try:
+            job = request.env["vehicle.print.history"].sudo().browse(job_id)
+
+            if not job.exists():
+                return self._error_response("Print job not found", 404)
+
+            return request.make_response(
+                json.dumps({"success": True, "job": self._print_job_data(job)}),
+                headers=[("Content-Type", "application/json")],
+            )
+
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    @http.route(
+        "/api/vehicle/print/job/<int:job_id>/status",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def report_print_job_status(self, job_id, **kwargs):
+        """Let external print stations (e.g. plate embossers) close their jobs"""
+        try:
+            status = kwargs.get("status")
+            if status not in ("success", "failed"):
+                return self._error_response("status must be success or failed", 400)
+
+            job = request.env["vehicle.print.history"].sudo().browse(job_id)
+
+            if not job.exists():
+                return self._error_response("Print job not found", 404)
+            if job.print_status != "pending":
+                return self._error_response(
+                    f"Print job already {job.print_status}", 409
+                )
+
+            vals = {"print_status": status, "attempt_count": job.attempt_count + 1}
+            if status == "success":
+                vals["print_date"] = fields.Datetime.now()
+            if kwargs.get("notes"):
+                vals["error_message" if status == "failed" else "notes"] = kwargs[
+                    "notes"
+                ]
+            job.write(vals)
+
+            return request.make_response(
+                json.dumps({"success": True, "job": self._print_job_data(job)}),
+                headers=[("Content-Type", "application/json")],
+            )
+
+        except Exception as e:
+            return self._error_response(str(e), 500)
+
+    def _print_job_data(self, job):
+        """Serialize a print job (vehicle.print.history record)"""
+        return {
+            "id": job.id,
+            "chassis_number": job.vehicle_id.chassis_number,
+            "print_type": job.print_type,
+            "printer_name": job.printer_name,
+            "status": job.print_status,
+            "attempts": job.attempt_count,
+            "next_attempt_date": (
+                job.next_attempt_date.isoformat() if job.next_attempt_date else None
+            ),
+            "error": job.error_message,
+            "print_date": job.print_date.isoformat() if job.print_date else None,
+        }
@@ -0,0 +1,84 @@
+import logging
+
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Collisions listed in the error message, all of them are logged
+REPORTED_COLLISIONS = 20
+
+# Vehicles sharing a chassis number once upper-cased and stripped of whitespace
+CHASSIS_COLLISIONS_SQL = r"""
+    SELECT chassis_key,
+           array_agg(id ORDER BY id),
+           array_agg(chassis_number ORDER BY id)
+      FROM (SELECT id, chassis_number,
+                   NULLIF(upper(regexp_replace(chassis_number, '\s+', '', 'g')), '')
+                       AS chassis_key
+              FROM vehicle_registration) AS vehicles
+     WHERE chassis_key IS NOT NULL
+     GROUP BY chassis_key
+    HAVING count(*) > 1
+     ORDER BY chassis_key
+"""
+
+# Vehicles issued the same plate number
+PLATE_COLLISIONS_SQL = """
+    SELECT plate_sequence,
+           array_agg(id ORDER BY id),
+           array_agg(chassis_number ORDER BY id)
+      FROM vehicle_registration
+     WHERE plate_sequence IS NOT NULL
+     GROUP BY plate_sequence
+    HAVING count(*) > 1
+     ORDER BY plate_sequence
+"""
+
+
+def migrate(cr, version):
+    """Stop the upgrade while chassis keys or plate numbers collide
+
+    chassis_key (the chassis number in upper case, without whitespace) and
+    plate_sequence get unique constraints. Vehicles registered twice by the
+    old check-then-insert, chassis numbers that only differ in case or
+    spacing, and plates handed out twice after switching plate allocator
+    would make PostgreSQL reject them, and Odoo would only log a warning.
+    They have to be merged or corrected before upgrading.
+    """
+    sections = [
+        (title, _collisions(cr, query))
+        for title, query in (
+            ("chassis numbers (ignoring case and whitespace)", CHASSIS_COLLISIONS_SQL),
+            ("plate numbers", PLATE_COLLISIONS_SQL),
+        )
+    ]
+    sections = [(title, lines) for title, lines in sections if lines]
+    if not sections:
+        return
+
+    messages = []
+    for title, lines in sections:
+        report = "\n".join(lines)
+        _logger.error(f"Vehicles sharing their {title}:\n{report}")
+        more = len(lines) - REPORTED_COLLISIONS
+        messages.append(
+            f"{len(lines)} {title} are registered on several vehicles:\n"
+            + "\n".join(lines[:REPORTED_COLLISIONS])
+            + (f"\n... and {more} more (see the server log)" if more > 0 else "")
+        )
+    raise UserError(
+        "Merge or correct these vehicles, then upgrade again.\n\n"
+        + "\n\n".join(messages)
+    )
+
+
+def _collisions(cr, query):
+    """One report line per colliding value: the value, then its vehicles"""
+    cr.execute(query)
+    return [
+        f"{value}: "
+        + ", ".join(
+            f"#{vehicle_id} {chassis!r}" for vehicle_id, chassis in zip(ids, numbers)
+        )
+        for value, ids, numbers in cr.fetchall()
+    ]
@@ -2,3 +2,8 @@
 
 from . import models
 from . import document_models
+from . import pipeline_models
+from . import sync_models
+from . import idempotency_models
+from . import print_log_models
+from . import stats_models
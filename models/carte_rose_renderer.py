@@ -0,0 +1,249 @@
+import logging
+import textwrap
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from odoo.tools.misc import file_path
+
+_logger = logging.getLogger(__name__)
+
+# Authentys Pro RT1 prints CR80 cards at 300 dpi
+PRINTER_DPI = 300
+CARD_WIDTH_MM = 86
+CARD_HEIGHT_MM = 54
+CARD_BACKGROUND = "#ffcccc"
+
+# A4 sheet imposition: 2 x 5 cards with a small cutting gap
+SHEET_WIDTH_MM = 210
+SHEET_HEIGHT_MM = 297
+SHEET_COLUMNS = 2
+SHEET_ROWS = 5
+SHEET_GAP_MM = 2
+CARDS_PER_SHEET = SHEET_COLUMNS * SHEET_ROWS
+
+FRONT_IMAGE = "rdc_printer/static/img/carte_rose_front.png"
+BACK_IMAGE = "rdc_printer/static/img/carte_rose_back.png"
+
+REMARKS = (
+    "En cas de vente ou cession du véhicule, le cessionnaire et le cédant "
+    "doivent, sous peine d'amende, en faire chacun la déclaration dans la "
+    "quinzaine au Responsable du Service Véhicule ou au commissionnaire à sa "
+    "résidence principale. Ces déclarations doivent être remises de la main à "
+    "la main ou être adressées par lettre recommandée au fonctionnaire précité. "
+    "A celui du cédant doit être joint le présent certificat aux fins de "
+    "validation. Les numéros propriétaires du cédant et du cessionnaire sont "
+    "exigés en cas de mutation."
+)
+
+
+@lru_cache(maxsize=32)
+def _load_font(size, bold=False):
+    """Load a TrueType font in pixels, falling back to Pillow's default font"""
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:  # Pillow < 10.1
+            return ImageFont.load_default()
+
+
+@lru_cache(maxsize=4)
+def _load_background(path, size):
+    """Card background scaled to the card size, or a flat pink card"""
+    try:
+        with Image.open(file_path(path)) as image:
+            return image.convert("RGB").resize(size)
+    except (FileNotFoundError, OSError):
+        return Image.new("RGB", size, CARD_BACKGROUND)
+
+
+class CarteRoseRenderer:
+    """Compose carte rose card sides with Pillow at the printer resolution
+
+    Mirrors the layout of the rdc_printer.carte_rose_document QWeb template,
+    without going through HTML and wkhtmltopdf.
+    """
+
+    def __init__(self, dpi=PRINTER_DPI):
+        self.dpi = dpi
+        self.size = (self.mm(CARD_WIDTH_MM), self.mm(CARD_HEIGHT_MM))
+
+    def mm(self, value):
+        """Millimetres to pixels"""
+        return round(value * self.dpi / 25.4)
+
+    def px(self, value):
+        """CSS pixels (as used by the QWeb template) to pixels"""
+        return round(value * self.dpi / 96)
+
+    def render_front(self, values):
+        image = _load_background(FRONT_IMAGE, self.size).copy()
+        draw = ImageDraw.Draw(image)
+        width, height = self.size
+        margin = self.mm(3)
+
+        y = margin
+        for line in (
+            "REPUBLIQUE DEMOCRATIQUE DU CONGO",
+            "CERTIFICAT D'IMMATRICULATION",
+        ):
+            y = self._centered(draw, line, y, _load_font(self.px(8), bold=True))
+        y = self._centered(
+            draw, "IDENTIFICATION DU PROPRIETAIRE", y, _load_font(self.px(6))
+        )
+        y += self.mm(2)
+        y = self._centered(
+            draw,
+            f"DGI/01/2013/{values['unique_plate_number']}/mv",
+            y,
+            _load_font(self.px(7), bold=True),
+        )
+        y += self.mm(2)
+
+        for label, value in (
+            ("Noms (ou Rais. Soc.) :", values["driver_name"]),
+            ("Adresses Phys. :", values["driver_address"]),
+            ("N° impôt :", values["tax_number"]),
+            ("Date de 1ère Mise en Circ. :", values["first_registration"]),
+            ("Usage :", values["usage"]),
+            ("N° Plaque :", values["plate_sequence"]),
+        ):
+            y = self._labelled(draw, label, value, margin, y, self.px(6))
+
+        if values["qr_code_image"]:
+            qr_size = self.mm(15)
+            with Image.open(BytesIO(values["qr_code_image"])) as qr_image:
+                qr_image = qr_image.convert("RGB").resize(
+                    (qr_size, qr_size), Image.NEAREST
+                )
+                image.paste(qr_image, (width - margin - qr_size, self.mm(15)))
+
+        font = _load_font(self.px(6), bold=True)
+        draw.text(
+            (margin, height - self.mm(2)),
+            f"Fait à Kinshasa, le {values['print_date']}",
+            font=font,
+            fill="black",
+            anchor="ls",
+        )
+        return image
+
+    def render_back(self, values):
+        image = _load_background(BACK_IMAGE, self.size).copy()
+        draw = ImageDraw.Draw(image)
+        width, height = self.size
+        margin = self.mm(3)
+
+        y = self._centered(
+            draw,
+            "IDENTIFICATION DU VEHICULE",
+            margin,
+            _load_font(self.px(8), bold=True),
+        )
+        y += self.mm(3)
+
+        for label, value in (
+            ("MARQUE & TYPE :", values["brand"]),
+            ("GENRE :", values["vehicle_type"]),
+            ("N° CHASSIS :", values["chassis_number"]),
+            ("ANNEE DE FABRICATION :", values["manufacturing_year"]),
+            ("COULEUR :", values["color"]),
+            ("PUISSANCE FISCALE :", values["fiscal_power"]),
+        ):
+            y = self._labelled(draw, label, value, margin, y, self.px(6))
+
+        y += self.mm(2)
+        y = self._line(
+            draw, "REMARQUES IMPORTANTES", margin, y, _load_font(self.px(5), bold=True)
+        )
+        font = _load_font(self.px(5))
+        # Leave room for the signature block on the right
+        chars = int((width - 2 * margin) * 0.75 / font.getlength("n"))
+        for line in textwrap.wrap(REMARKS, chars):
+            y = self._line(draw, line, margin, y, font)
+
+        y = height - self.mm(2)
+        for text, bold in (
+            ("Nelly Mbila Nzazi", True),
+            ("véhicule", False),
+            ("Responsable du service", False),
+        ):
+            font = _load_font(self.px(6), bold=bold)
+            draw.text(
+                (width - margin, y), text, font=font, fill="black", anchor="rs"
+            )
+            y -= self._line_height(font)
+        return image
+
+    def render(self, values):
+        """Return the (front, back) images of one card"""
+        return self.render_front(values), self.render_back(values)
+
+    def impose(self, cards):
+        """Lay (front, back) card pairs out on A4 sheets
+
+        Every sheet of fronts is followed by its sheet of backs with the
+        columns mirrored, so the sides line up when printed long-edge duplex.
+        """
+        sheet_size = (self.mm(SHEET_WIDTH_MM), self.mm(SHEET_HEIGHT_MM))
+        card_width, card_height = self.size
+        gap = self.mm(SHEET_GAP_MM)
+        left = (sheet_size[0] - SHEET_COLUMNS * (card_width + gap) + gap) // 2
+        top = (sheet_size[1] - SHEET_ROWS * (card_height + gap) + gap) // 2
+
+        sheets = []
+        for start in range(0, len(cards), CARDS_PER_SHEET):
+            fronts = Image.new("RGB", sheet_size, "white")
+            backs = Image.new("RGB", sheet_size, "white")
+            for index, (front, back) in enumerate(
+                cards[start : start + CARDS_PER_SHEET]
+            ):
+                row, column = divmod(index, SHEET_COLUMNS)
+                y = top + row * (card_height + gap)
+                fronts.paste(front, (left + column * (card_width + gap), y))
+                mirrored = SHEET_COLUMNS - 1 - column
+                backs.paste(back, (left + mirrored * (card_width + gap), y))
+            sheets.extend([fronts, backs])
+        return sheets
+
+    def to_pdf(self, images):
+        """One PDF page per image, at the printer resolution"""
+        buffer = BytesIO()
+        images[0].save(
+            buffer,
+            format="PDF",
+            save_all=True,
+            append_images=images[1:],
+            resolution=self.dpi,
+        )
+        return buffer.getvalue()
+
+    def to_png(self, image):
+        buffer = BytesIO()
+        image.save(buffer, format="PNG", dpi=(self.dpi, self.dpi))
+        return buffer.getvalue()
+
+    def _line_height(self, font):
+        ascent, descent = font.getmetrics()
+        return round((ascent + descent) * 1.2)
+
+    def _line(self, draw, text, x, y, font):
+        draw.text((x, y), text, font=font, fill="black")
+        return y + self._line_height(font)
+
+    def _centered(self, draw, text, y, font):
+        draw.text((self.size[0] / 2, y), text, font=font, fill="black", anchor="ma")
+        return y + self._line_height(font)
+
+    def _labelled(self, draw, label, value, x, y, size):
+        """Bold label followed by its value, as in the QWeb template"""
+        bold = _load_font(size, bold=True)
+        draw.text((x, y), label, font=bold, fill="black")
+        if value not in (None, False, ""):
+            offset = bold.getlength(label + " ")
+            draw.text((x + offset, y), str(value), font=_load_font(size), fill="black")
+        return y + self._line_height(bold) + self.mm(0.5)
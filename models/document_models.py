@@ -1,4 +1,13 @@
-from odoo import models, fields
+from odoo import models, fields, api, tools
+from odoo.tools.mimetypes import guess_mimetype
+import base64
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+# Uploads are copied to the filestore in chunks of this size
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 class VehicleDocument(models.Model):
@@ -23,6 +32,149 @@ class VehicleDocument(models.Model):
         default="other",
     )
 
-    document_file = fields.Binary(string="Document File", required=True)
+    # Stored as an ir.attachment; streamed uploads attach their file directly,
+    # so the field is only required in the views
+    document_file = fields.Binary(string="Document File", attachment=True)
     file_name = fields.Char(string="File Name")
     upload_date = fields.Datetime(string="Upload Date", default=fields.Datetime.now)
+    checksum = fields.Char(string="SHA-256", index=True, readonly=True, copy=False)
+    file_size = fields.Integer(string="File Size", readonly=True, copy=False)
+    mimetype = fields.Char(string="MIME Type", readonly=True, copy=False)
+
+    def init(self):
+        # Change feed (/api/vehicle/changes)
+        tools.create_index(
+            self.env.cr,
+            "vehicle_document_write_date_id_idx",
+            self._table,
+            ["write_date", "id"],
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            self._update_file_values(vals)
+        return super(VehicleDocument, self).create(vals_list)
+
+    def write(self, vals):
+        self._update_file_values(vals)
+        return super(VehicleDocument, self).write(vals)
+
+    def unlink(self):
+        self.env["vehicle.sync.tombstone"]._record(self)
+        return super(VehicleDocument, self).unlink()
+
+    @api.model
+    def _update_file_values(self, vals):
+        """Fill in the hash, size and type of a file set through the ORM"""
+        if "document_file" not in vals:
+            return
+        raw = base64.b64decode(vals["document_file"] or b"")
+        vals.update(
+            checksum=raw and hashlib.sha256(raw).hexdigest(),
+            file_size=len(raw),
+            mimetype=raw and self._guess_mimetype(raw[:1024], vals.get("file_name")),
+        )
+
+    @api.model
+    def _create_from_upload(self, uploaded_file, vals):
+        """Create a document whose file is streamed from an upload"""
+        file_values = self._stream_to_filestore(uploaded_file.stream, vals.get("file_name"))
+        document = self.create(
+            dict(
+                vals,
+                checksum=file_values.pop("sha256"),
+                file_size=file_values["file_size"],
+                mimetype=file_values["mimetype"],
+            )
+        )
+        document._attach_file(file_values)
+        return document
+
+    def _attach_file(self, file_values):
+        """Link a file written by _stream_to_filestore as the document file"""
+        self.ensure_one()
+        return (
+            self.env["ir.attachment"]
+            .sudo()
+            .create(
+                dict(
+                    file_values,
+                    res_model=self._name,
+                    res_field="document_file",
+                    res_id=self.id,
+                )
+            )
+        )
+
+    @api.model
+    def _stream_to_filestore(self, stream, filename=None):
+        """Copy a file stream into the filestore, hashing it on the way
+
+        Memory use is bounded by the chunk size. The filestore is content
+        addressed (by SHA-1, as ir.attachment expects), so a file that is
+        already stored, such as the same insurance PDF uploaded for a whole
+        fleet, is kept once on disk. Returns the ir.attachment values of the
+        file plus its SHA-256.
+        """
+        Attachment = self.env["ir.attachment"].sudo()
+        if Attachment._storage() != "file":
+            raw = stream.read()
+            return {
+                "name": filename or "document",
+                "raw": raw,
+                "sha256": hashlib.sha256(raw).hexdigest(),
+                "file_size": len(raw),
+                "mimetype": self._guess_mimetype(raw[:1024], filename),
+            }
+
+        sha1 = hashlib.sha1()
+        sha256 = hashlib.sha256()
+        size = 0
+        head = b""
+        with tempfile.NamedTemporaryFile(
+            dir=Attachment._filestore(), prefix=".upload-", delete=False
+        ) as tmp:
+            try:
+                while True:
+                    chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if len(head) < 1024:
+                        head += chunk[: 1024 - len(head)]
+                    sha1.update(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    tmp.write(chunk)
+            except Exception:
+                os.unlink(tmp.name)
+                raise
+
+        checksum = sha1.hexdigest()
+        fname = f"{checksum[:2]}/{checksum}"
+        full_path = Attachment._full_path(fname)
+        if os.path.exists(full_path):
+            os.unlink(tmp.name)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(tmp.name, full_path)
+            # Let the attachment GC remove it if this transaction aborts
+            Attachment._mark_for_gc(fname)
+
+        return {
+            "name": filename or "document",
+            "type": "binary",
+            "store_fname": fname,
+            "checksum": checksum,
+            "sha256": sha256.hexdigest(),
+            "file_size": size,
+            "mimetype": self._guess_mimetype(head, filename),
+        }
+
+    @api.model
+    def _guess_mimetype(self, head, filename=None):
+        """MIME type from the file content, or its name when inconclusive"""
+        mimetype = guess_mimetype(head, default="application/octet-stream")
+        if mimetype == "application/octet-stream" and filename:
+            mimetype = mimetypes.guess_type(filename)[0] or mimetype
+        return mimetype
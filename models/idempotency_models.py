@@ -0,0 +1,129 @@
+from datetime import timedelta
+from odoo import models, fields, api
+from .models import TTLCache
+
+# Stored responses are replayed for this long (seconds, overridden by the
+# "rdc_printer.idempotency_ttl" system parameter)
+IDEMPOTENCY_TTL = 24 * 3600
+
+# Completed responses kept in memory per worker process
+IDEMPOTENCY_CACHE_SIZE = 10000
+IDEMPOTENCY_CACHE_TTL = 300  # seconds
+
+_idempotency_cache = TTLCache(IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_CACHE_TTL)
+
+
+class IdempotencyKey(models.Model):
+    _name = "vehicle.idempotency.key"
+    _description = "API Idempotency Key"
+    _order = "id desc"
+
+    key = fields.Char(string="Key", required=True)
+    endpoint = fields.Char(string="Endpoint", required=True)
+    request_hash = fields.Char(string="Request Hash")
+    status_code = fields.Integer(string="Status Code")
+    content_type = fields.Char(string="Content Type")
+    response_body = fields.Text(string="Response Body")
+
+    _sql_constraints = [
+        (
+            "key_endpoint_unique",
+            "unique(key, endpoint)",
+            "An idempotency key can only be used once per endpoint!",
+        ),
+    ]
+
+    @api.model
+    def _get_ttl(self):
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        return int(get_param("rdc_printer.idempotency_ttl", IDEMPOTENCY_TTL))
+
+    @api.model
+    def _reserve(self, endpoint, key, request_hash):
+        """Claim key for a new request, or return the response stored for it
+
+        Returns None when the caller must run the request and then call
+        _store_response, or a dict with the request_hash, status_code,
+        content_type and body of the earlier request. A duplicate sent while
+        the first request is still running waits on the unique index, then
+        gets the stored response (through a serialization failure and the
+        automatic retry of the request when it started before the commit).
+        """
+        cache_key = (self.env.cr.dbname, endpoint, key)
+        stored = _idempotency_cache.get(cache_key)
+        if stored is not TTLCache.MISSING:
+            return stored
+
+        cr = self.env.cr
+        expired_before = fields.Datetime.now() - timedelta(seconds=self._get_ttl())
+        cr.execute(
+            """
+            INSERT INTO vehicle_idempotency_key
+                        (key, endpoint, request_hash, create_uid, create_date,
+                         write_uid, write_date)
+                 VALUES (%(key)s, %(endpoint)s, %(hash)s, %(uid)s,
+                         now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC')
+            ON CONFLICT (key, endpoint) DO UPDATE
+                    SET request_hash = EXCLUDED.request_hash,
+                        status_code = NULL,
+                        content_type = NULL,
+                        response_body = NULL,
+                        create_date = EXCLUDED.create_date,
+                        write_date = EXCLUDED.write_date
+                  WHERE vehicle_idempotency_key.create_date < %(expired_before)s
+              RETURNING id
+            """,
+            {
+                "key": key,
+                "endpoint": endpoint,
+                "hash": request_hash,
+                "uid": self.env.uid,
+                "expired_before": expired_before,
+            },
+        )
+        if cr.fetchone():
+            return None
+
+        cr.execute(
+            """
+            SELECT request_hash, status_code, content_type, response_body
+              FROM vehicle_idempotency_key
+             WHERE key = %s AND endpoint = %s
+            """,
+            [key, endpoint],
+        )
+        request_hash, status_code, content_type, body = cr.fetchone()
+        stored = {
+            "request_hash": request_hash,
+            "status_code": status_code,
+            "content_type": content_type,
+            "body": body,
+        }
+        if status_code:
+            _idempotency_cache.set(cache_key, stored)
+        return stored
+
+    @api.model
+    def _store_response(self, endpoint, key, request_hash, response):
+        """Record the response of a request reserved with _reserve"""
+        stored = {
+            "request_hash": request_hash,
+            "status_code": response.status_code,
+            "content_type": response.headers.get("Content-Type"),
+            "body": response.get_data(as_text=True),
+        }
+        self.env.cr.execute(
+            """
+            UPDATE vehicle_idempotency_key
+               SET status_code = %s, content_type = %s, response_body = %s
+             WHERE key = %s AND endpoint = %s
+            """,
+            [stored["status_code"], stored["content_type"], stored["body"], key, endpoint],
+        )
+        cache_key = (self.env.cr.dbname, endpoint, key)
+        self.env.cr.postcommit.add(lambda: _idempotency_cache.set(cache_key, stored))
+
+    @api.autovacuum
+    def _gc_idempotency_keys(self):
+        expired_before = fields.Datetime.now() - timedelta(seconds=self._get_ttl())
+        self.sudo().search([("create_date", "<", expired_before)]).unlink()
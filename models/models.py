@@ -1,13 +1,245 @@
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime, date, timedelta
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+from odoo.osv import expression
+from odoo.tools import SQL, format_date, split_every, str2bool
+import psycopg2
+from psycopg2 import errors as pg_errors
+from odoo.tools.pdf import merge_pdf
+from .carte_rose_renderer import CARDS_PER_SHEET, CarteRoseRenderer
 import qrcode
 import base64
+import hashlib
+import hmac
 import json
 import logging
+import math
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import subprocess
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 from io import BytesIO
 
 _logger = logging.getLogger(__name__)
 
+# Number of rendered QR images kept in memory per worker process
+QR_CACHE_SIZE = 1024
+
+# Fields printed on the carte rose; writing any of them drops the cached PDF
+CARTE_ROSE_FIELDS = {
+    "unique_plate_number",
+    "driver_name",
+    "driver_address",
+    "tax_number",
+    "first_registration",
+    "usage",
+    "plate_sequence",
+    "print_date",
+    "brand",
+    "vehicle_type",
+    "chassis_number",
+    "manufacturing_year",
+    "color",
+    "fiscal_power",
+    "qr_code_image",
+}
+
+# Batch QR generation: smallest selection rendered in a process pool and the
+# upper bound on pool processes; smaller batches are rendered inline
+QR_POOL_THRESHOLD = 200
+QR_POOL_MAX_WORKERS = 4
+
+# QWeb templates drawing the carte rose; editing any of them drops cached PDFs
+CARTE_ROSE_TEMPLATES = [
+    "rdc_printer.carte_rose_document",
+    "rdc_printer.carte_rose_front",
+    "rdc_printer.carte_rose_back",
+]
+
+# Batch carte rose PDFs are downloaded once; older ones are garbage collected
+CARTE_ROSE_BATCH_PREFIX = "carte_rose_batch_"
+CARTE_ROSE_BATCH_TTL = 24  # hours
+
+# Compact QR payloads: version prefix and signature length (bytes of the HMAC)
+QR_COMPACT_PREFIX = "RDC1"
+QR_SIGNATURE_BYTES = 10
+
+# Print spooler: job types it prints, worker threads per cron run and the
+# base retry delay in seconds (doubled after each failed attempt)
+SPOOLED_PRINT_TYPES = ("carte_rose", "reprint")
+PRINT_TYPES = [
+    ("license_plate", "License Plate"),
+    ("carte_rose", "Carte Rose"),
+    ("reprint", "Reprint"),
+]
+SPOOLER_MAX_THREADS = 8
+SPOOLER_RETRY_DELAY = 30
+# Printer of jobs queued without one, see the "rdc_printer.default_printer"
+# system parameter
+DEFAULT_PRINTER = "Authentys Pro RT1"
+
+# Plate allocation strategies, selected with the "rdc_printer.plate_allocator"
+# system parameter:
+#   row      - bump plate.sequence in the registration transaction (gapless)
+#   sequence - draw from a native PostgreSQL sequence per region (no row lock)
+#   block    - reserve blocks of numbers per worker process and hand them out
+#              from memory
+PLATE_ALLOCATOR_MODES = ("row", "sequence", "block")
+
+# Blocks reserved by this process, keyed by (dbname, region_code) and holding
+# (next_number, last_number)
+_plate_blocks = {}
+_plate_blocks_lock = threading.Lock()
+
+# Fields matched by the free-text (q=) vehicle search
+TEXT_SEARCH_FIELDS = ["chassis_number", "driver_name", "brand", "plate_sequence"]
+
+# Registry export: vehicles per chunk, fields never exported and the document
+# metadata attached to each vehicle
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_EXCLUDED_FIELDS = {"carte_rose_cache_key", "carte_rose_attachment_id"}
+EXPORT_DOCUMENT_FIELDS = [
+    "document_name",
+    "document_type",
+    "file_name",
+    "upload_date",
+    "checksum",
+    "file_size",
+    "mimetype",
+]
+
+# Roadside QR verification cache: chassis -> small projection of the vehicle
+VERIFICATION_FIELDS = [
+    "chassis_number",
+    "plate_sequence",
+    "unique_plate_number",
+    "region_code",
+    "is_reprinted",
+]
+VERIFICATION_CACHE_SIZE = 50000
+VERIFICATION_CACHE_TTL = 30  # seconds
+
+# Registered chassis keys per database, see _get_chassis_filter
+CHASSIS_FILTER_MIN_CAPACITY = 100000
+CHASSIS_FILTER_ERROR_RATE = 0.01
+_chassis_filters = {}
+_chassis_filters_lock = threading.Lock()
+# Databases whose unique chassis_key index has been seen in place
+_chassis_indexed_dbs = set()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    MISSING = object()
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or TTLCache.MISSING"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return self.MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return self.MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+_verification_cache = TTLCache(VERIFICATION_CACHE_SIZE, VERIFICATION_CACHE_TTL)
+
+
+class BloomFilter:
+    """Thread-safe Bloom filter of strings
+
+    `key in bloom` is False for keys never added; for other keys it is wrong
+    at most `error_rate` of the time while no more than `capacity` keys have
+    been added.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        # Double hashing over the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def is_full(self):
+        return self.count > self.capacity
+
+
+def _export_value(value):
+    """Value read from the ORM as exported (dates in ISO 8601, binaries base64)"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _render_qr_code(payload):
+    """Render a QR code payload to a base64 encoded PNG"""
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    # Create image
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    # Convert to base64 for storage
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
 
 class VehicleRegistration(models.Model):
     _name = "vehicle.registration"
@@ -15,29 +247,49 @@ class VehicleRegistration(models.Model):
     _rec_name = "chassis_number"
     # _inherit = ["mail.thread", "mail.activity.mixin"]  # 1
 
-    qr_code_image = fields.Binary(string="QR Code Image")
+    # Kept in the filestore, see the rdc_migrate_binaries command for
+    # databases that still have the image inline in the table
+    qr_code_image = fields.Binary(string="QR Code Image", attachment=True)
     # Unique identifier (chassis number)
     # chassis_number = fields.Char(string="Chassis Number", required=True, index=True)
     chassis_number = fields.Char(
         string="Chassis Number", required=True, index=True, tracking=True
     )  # 1
+    # Case and whitespace insensitive chassis number, unique
+    chassis_key = fields.Char(
+        string="Chassis Key",
+        compute="_compute_chassis_key",
+        store=True,
+        readonly=True,
+        copy=False,
+    )
 
     # Add this field to VehicleRegistration
     document_ids = fields.One2many("vehicle.document", "vehicle_id", string="Documents")
     print_history_ids = fields.One2many(
         "vehicle.print.history", "vehicle_id", string="Print History"
     )  # 1
+    registration_task_ids = fields.One2many(
+        "vehicle.registration.task", "vehicle_id", string="Registration Tasks"
+    )
+    registration_state = fields.Selection(
+        [("processing", "Processing"), ("done", "Registered"), ("failed", "Failed")],
+        string="Registration State",
+        default="done",
+        readonly=True,
+        copy=False,
+    )
 
     # Driver Information
     # driver_name = fields.Char(string="Driver Name")
-    driver_name = fields.Char(string="Driver Name", tracking=True)  # 1
+    driver_name = fields.Char(string="Driver Name", tracking=True, index="trigram")  # 1
 
     driver_address = fields.Text(string="Driver Address")
     tax_number = fields.Char(string="Tax Number (N° impot)")
 
     # Vehicle Information
     # brand = fields.Char(string="Brand (Marque)")
-    brand = fields.Char(string="Brand (Marque)", tracking=True)  # 1
+    brand = fields.Char(string="Brand (Marque)", tracking=True, index="trigram")  # 1
     vehicle_type = fields.Char(string="Vehicle Type (Genre)")
     manufacturing_year = fields.Integer(
         string="Manufacturing Year (Année de fabrication)"
@@ -55,11 +307,24 @@ class VehicleRegistration(models.Model):
     #     string="Plate Sequence", compute="_compute_plate_sequence", store=True
     # )
     # 2
-    plate_sequence = fields.Char(string="Plate Sequence", readonly=True)
+    plate_sequence = fields.Char(
+        string="Plate Sequence", readonly=True, index="trigram"
+    )
     unique_plate_number = fields.Char(
         string="Unique Plate Number", compute="_compute_unique_plate_number", store=True
     )
     qr_code_data = fields.Text(string="QR Code Data")
+    qr_code_hash = fields.Char(string="QR Code Hash", readonly=True, copy=False)
+    carte_rose_cache_key = fields.Char(
+        string="Carte Rose Cache Key", readonly=True, copy=False
+    )
+    carte_rose_attachment_id = fields.Many2one(
+        "ir.attachment",
+        string="Cached Carte Rose",
+        readonly=True,
+        copy=False,
+        ondelete="set null",
+    )
 
     # Printing Information
     print_location = fields.Char(string="Print Location")
@@ -107,6 +372,192 @@ class VehicleRegistration(models.Model):
         tracking=True,
     )
 
+    _sql_constraints = [
+        (
+            "chassis_key_unique",
+            "unique(chassis_key)",
+            "A vehicle with this chassis number already exists!",
+        ),
+        (
+            "plate_sequence_unique",
+            "unique(plate_sequence)",
+            "This plate number is already issued!",
+        ),
+    ]
+
+    def _auto_init(self):
+        # Trigram indexes need pg_trgm, which the database owner can create
+        # itself on PostgreSQL 13+
+        if not self.pool.has_trigram:
+            try:
+                with self.env.cr.savepoint():
+                    self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                self.pool.has_trigram = True
+            except psycopg2.Error as e:
+                _logger.warning(
+                    f"pg_trgm is not available, partial vehicle searches will "
+                    f"scan the table: {e}"
+                )
+        return super(VehicleRegistration, self)._auto_init()
+
+    def init(self):
+        # Keyset pagination of /api/vehicle/search
+        tools.create_index(
+            self.env.cr,
+            "vehicle_registration_create_date_id_idx",
+            self._table,
+            ["create_date DESC", "id DESC"],
+        )
+        # Change feed (/api/vehicle/changes)
+        tools.create_index(
+            self.env.cr,
+            "vehicle_registration_write_date_id_idx",
+            self._table,
+            ["write_date", "id"],
+        )
+        # Duplicate checks look chassis keys up while the unique index could
+        # not be created (see migrations/0.2)
+        if not self._has_chassis_unique_index():
+            _logger.warning(
+                "Chassis keys are not unique, duplicate registrations are only "
+                "prevented by the checks in create()"
+            )
+            tools.create_index(
+                self.env.cr,
+                "vehicle_registration_chassis_key_idx",
+                self._table,
+                ["chassis_key"],
+            )
+        # chassis_number keeps its btree index for exact lookups, partial
+        # (ilike) lookups get a trigram one
+        if self.pool.has_trigram:
+            tools.create_index(
+                self.env.cr,
+                "vehicle_registration_chassis_number_trgm_idx",
+                self._table,
+                ['"chassis_number" gin_trgm_ops'],
+                method="gin",
+            )
+
+    @api.model
+    def _get_text_search_domain(self, text):
+        """Vehicles containing text in any of the free-text search fields"""
+        return expression.OR(
+            [[(fname, "ilike", text)] for fname in TEXT_SEARCH_FIELDS]
+        )
+
+    @api.model
+    def _search_ranked(self, domain, text, limit=None, offset=0):
+        """(id, score) of the vehicles of domain, most similar to text first
+
+        The score is the best trigram similarity of text to the free-text
+        search fields. Without pg_trgm, records come newest first with a
+        score of 0.
+        """
+        table = self._table
+        if self.pool.has_trigram:
+            score = SQL(
+                "GREATEST(%s)",
+                SQL(", ").join(
+                    SQL(
+                        "similarity(COALESCE(%s, ''), %s)",
+                        SQL.identifier(table, fname),
+                        text,
+                    )
+                    for fname in TEXT_SEARCH_FIELDS
+                ),
+            )
+        else:
+            score = SQL("0")
+        query = self._search(domain)
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT %(id)s, %(score)s AS score
+                  FROM %(from)s
+                 WHERE %(where)s
+                 ORDER BY score DESC, %(create_date)s DESC, %(id)s DESC
+                 LIMIT %(limit)s OFFSET %(offset)s
+                """,
+                id=SQL.identifier(table, "id"),
+                score=score,
+                create_date=SQL.identifier(table, "create_date"),
+                limit=limit,
+                offset=offset,
+                **{"from": query.from_clause, "where": query.where_clause or SQL("TRUE")},
+            )
+        )
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _get_export_fields(self, fnames=None, with_binary=False):
+        """Fields of a registry export, the stored ones by default
+
+        Binary fields are left out unless with_binary is set or they are
+        asked for explicitly; ValueError for unknown or non stored fields.
+        """
+        if fnames:
+            invalid = [
+                fname
+                for fname in fnames
+                if fname not in self._fields or not self._fields[fname].store
+            ]
+            if invalid:
+                raise ValueError(f"Cannot export fields: {', '.join(invalid)}")
+            return ["id"] + [fname for fname in fnames if fname != "id"]
+        return [
+            fname
+            for fname, field in self._fields.items()
+            if field.store
+            and field.type not in ("one2many", "many2many")
+            and (with_binary or field.type != "binary")
+            and fname not in EXPORT_EXCLUDED_FIELDS
+        ]
+
+    @api.model
+    def _get_export_chunk(self, domain, fnames, after_id=0, limit=None, with_documents=True):
+        """Next rows of a registry export, JSON ready and in id order
+
+        Rows come after the vehicle after_id, so a whole export is a series
+        of index range scans whatever its size. The document metadata of the
+        chunk is read with one query and added to each row as "documents".
+        """
+        rows = self.search_read(
+            expression.AND([domain, [("id", ">", after_id)]]),
+            fnames,
+            limit=limit or EXPORT_CHUNK_SIZE,
+            order="id",
+            load=None,
+        )
+        if with_documents and rows:
+            documents = defaultdict(list)
+            for document in self.env["vehicle.document"].search_read(
+                [("vehicle_id", "in", [row["id"] for row in rows])],
+                ["vehicle_id"] + EXPORT_DOCUMENT_FIELDS,
+                order="vehicle_id, id",
+                load=None,
+            ):
+                documents[document.pop("vehicle_id")].append(
+                    {name: _export_value(value) for name, value in document.items()}
+                )
+            for row in rows:
+                row["documents"] = documents[row["id"]]
+        for row in rows:
+            for fname in fnames:
+                row[fname] = _export_value(row[fname])
+        return rows
+
+    @api.model
+    def _estimate_count(self, domain):
+        """Planner estimate of the number of records matching the domain
+
+        Costs one EXPLAIN instead of counting the rows. The estimate comes
+        from the table statistics and is accurate enough for page counts.
+        """
+        query = self._search(domain)
+        self.env.cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query.select()))
+        return int(self.env.cr.fetchone()[0][0]["Plan"]["Plan Rows"])
+
     @api.depends("region_code")
     def _compute_unique_plate_number(self):
         """Compute unique 7-digit number for license plate"""
@@ -125,81 +576,437 @@ class VehicleRegistration(models.Model):
             if not record.plate_sequence and record.region_code:
                 record.plate_sequence = "0000AA00"
 
-    @api.model
-    def create(self, vals):
-        """Override create to ensure chassis number uniqueness"""
-        # Check if chassis number already exists
-        if "chassis_number" in vals:
-            existing = self.search([("chassis_number", "=", vals["chassis_number"])])
-            if existing:
-                raise models.ValidationError(
-                    f"Chassis number {vals['chassis_number']} already exists!"
-                )
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to ensure chassis number uniqueness
+
+        The unique index on chassis_key is what prevents duplicates; the
+        checks below only turn the obvious ones into a readable error.
+        """
+        chassis_keys = [
+            self._normalize_chassis(vals["chassis_number"])
+            for vals in vals_list
+            if vals.get("chassis_number")
+        ]
+        duplicates = {key for key, count in Counter(chassis_keys).items() if count > 1}
+        duplicates |= self._find_registered_chassis(chassis_keys)
+        if duplicates:
+            raise models.ValidationError(
+                f"Chassis number {', '.join(sorted(duplicates))} already exists!"
+            )
         # 2
-        if "region_code" in vals:
-            plate_number = self._generate_plate_number(vals["region_code"])
-            vals["plate_sequence"] = plate_number
+        # Allocate one range of plate numbers per region, in a stable region
+        # order so concurrent batches lock the sequence rows consistently
+        vals_by_region = defaultdict(list)
+        for vals in vals_list:
+            if vals.get("region_code"):
+                vals_by_region[vals["region_code"]].append(vals)
+        for region_code in sorted(vals_by_region):
+            region_vals = vals_by_region[region_code]
+            numbers = self.env["plate.sequence"]._allocate_numbers(
+                region_code, len(region_vals)
+            )
+            for vals, number in zip(region_vals, numbers):
+                vals["plate_sequence"] = self._format_plate_number(number, region_code)
 
-        return super(VehicleRegistration, self).create(vals)
+        vehicles = super(VehicleRegistration, self).create(vals_list)
+        # Drop cached "not found" verification results for the new chassis
+        vehicles._invalidate_verification_cache()
+        vehicles._add_to_chassis_filter()
+        return vehicles
 
-    def generate_qr_code(self):
-        """Generate actual QR code image"""
+    def write(self, vals):
+        """Keep the QR verification and carte rose caches in sync"""
+        self._invalidate_verification_cache()
+        if CARTE_ROSE_FIELDS.intersection(vals):
+            self._clear_carte_rose_cache()
+        res = super(VehicleRegistration, self).write(vals)
+        if "chassis_number" in vals:
+            self._invalidate_verification_cache()
+            self._add_to_chassis_filter()
+        return res
+
+    def unlink(self):
+        self._invalidate_verification_cache()
+        # Documents and history go with the vehicle (ondelete cascade)
+        Tombstone = self.env["vehicle.sync.tombstone"]
+        Tombstone._record(self)
+        Tombstone._record(self.document_ids)
+        Tombstone._record(self.print_history_ids)
+        return super(VehicleRegistration, self).unlink()
+
+    @api.depends("chassis_number")
+    def _compute_chassis_key(self):
         for record in self:
-            qr_data = {
-                "chassis": record.chassis_number,
-                "plate": record.plate_sequence,
-                "unique_id": record.unique_plate_number,
-                "driver": record.driver_name,
-                "brand": record.brand,
-                "year": record.manufacturing_year,
-                "region": record.region_code,  # 1
-                "generated_at": fields.Datetime.now().isoformat(),  # 1
+            record.chassis_key = self._normalize_chassis(record.chassis_number)
+
+    @api.model
+    def _normalize_chassis(self, chassis_number):
+        """Chassis key: upper case, without any whitespace"""
+        return re.sub(r"\s+", "", chassis_number or "").upper() or False
+
+    @api.model
+    def _search_by_chassis(self, chassis_number, limit=1):
+        """Vehicles by chassis number, ignoring case and whitespace"""
+        return self.search(
+            [("chassis_key", "=", self._normalize_chassis(chassis_number))], limit=limit
+        )
+
+    @api.model
+    def _get_chassis_filter(self):
+        """Bloom filter of the registered chassis keys, None when disabled
+
+        Enabled with the "rdc_printer.chassis_bloom_filter" system parameter.
+        It is loaded from the table on first use and reloaded once it has
+        grown past its capacity. Chassis registered by other workers in the
+        meantime are missing from it, which only means their duplicates are
+        caught by the unique index instead of the pre-check.
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        if not str2bool(get_param("rdc_printer.chassis_bloom_filter", "False")):
+            return None
+        dbname = self.env.cr.dbname
+        with _chassis_filters_lock:
+            bloom = _chassis_filters.get(dbname)
+            if bloom is None or bloom.is_full():
+                self.env.cr.execute(
+                    "SELECT chassis_key FROM vehicle_registration"
+                    " WHERE chassis_key IS NOT NULL"
+                )
+                keys = [row[0] for row in self.env.cr.fetchall()]
+                bloom = BloomFilter(
+                    max(2 * len(keys), CHASSIS_FILTER_MIN_CAPACITY),
+                    CHASSIS_FILTER_ERROR_RATE,
+                )
+                for key in keys:
+                    bloom.add(key)
+                _chassis_filters[dbname] = bloom
+        return bloom
+
+    @api.model
+    def _has_chassis_unique_index(self):
+        """Whether the unique index on chassis_key exists in this database"""
+        dbname = self.env.cr.dbname
+        if dbname not in _chassis_indexed_dbs and tools.sql.constraint_definition(
+            self.env.cr, self._table, f"{self._table}_chassis_key_unique"
+        ):
+            _chassis_indexed_dbs.add(dbname)
+        return dbname in _chassis_indexed_dbs
+
+    @api.model
+    def _find_registered_chassis(self, chassis_numbers):
+        """Chassis keys among chassis_numbers that are already registered
+
+        Once the unique index is in place, only the keys the Bloom filter
+        reports as possibly registered are looked up: new chassis cost no
+        query, and without the filter nothing is checked before the insert.
+        Without the index every key is looked up.
+        """
+        keys = {self._normalize_chassis(chassis) for chassis in chassis_numbers}
+        keys = [key for key in keys if key]
+        if self._has_chassis_unique_index():
+            bloom = self._get_chassis_filter()
+            if bloom is None:
+                return set()
+            keys = [key for key in keys if key in bloom]
+        if not keys:
+            return set()
+        existing = self.search_read([("chassis_key", "in", keys)], ["chassis_key"])
+        return {row["chassis_key"] for row in existing}
+
+    def _add_to_chassis_filter(self):
+        bloom = self._get_chassis_filter()
+        if bloom is not None:
+            for key in self.mapped("chassis_key"):
+                if key:
+                    bloom.add(key)
+
+    def _invalidate_verification_cache(self):
+        """Evict these vehicles from the verification cache, now and on commit"""
+        dbname = self.env.cr.dbname
+        keys = [(dbname, chassis_key) for chassis_key in self.mapped("chassis_key")]
+        _verification_cache.discard(keys)
+        # A concurrent scan may re-cache the old values before we commit
+        self.env.cr.postcommit.add(lambda: _verification_cache.discard(keys))
+
+    @api.model
+    def _get_verification_projection(self, chassis_number):
+        """Small projection used to verify scanned QR codes, served from cache
+
+        Looked up by chassis key, as compact payloads carry the chassis
+        number upper-cased and without whitespace.
+        """
+        chassis_key = self._normalize_chassis(chassis_number)
+        key = (self.env.cr.dbname, chassis_key)
+        projection = _verification_cache.get(key)
+        if projection is TTLCache.MISSING:
+            rows = self.search_read(
+                [("chassis_key", "=", chassis_key)],
+                VERIFICATION_FIELDS,
+                limit=1,
+            )
+            # Unknown chassis are cached too, so repeated bad scans stay cheap
+            projection = rows[0] if rows else None
+            _verification_cache.set(key, projection)
+        return projection
+
+    @api.model
+    def _verify_qr_payload(self, payload):
+        """Check a scanned QR payload against the registered vehicle"""
+        decoded = self._decode_qr_payload(payload)
+        result = {"valid": False, "reason": None, "vehicle": None}
+        if decoded["signature_valid"] is False:
+            result["reason"] = "invalid_signature"
+            return result
+        vehicle = self._get_verification_projection(decoded["chassis"])
+        if not vehicle:
+            result["reason"] = "not_found"
+            return result
+        result["vehicle"] = vehicle
+        if vehicle["plate_sequence"] != decoded["plate"]:
+            result["reason"] = "plate_mismatch"
+        elif vehicle["unique_plate_number"] != decoded["unique_id"]:
+            result["reason"] = "unique_id_mismatch"
+        else:
+            result["valid"] = True
+        return result
+
+    def _get_qr_payload(self):
+        """Printable data encoded in the QR code
+
+        Contains no timestamp, so the payload (and its hash) only changes when
+        a printed field changes.
+        """
+        self.ensure_one()
+        return {
+            "chassis": self.chassis_number,
+            "plate": self.plate_sequence,
+            "unique_id": self.unique_plate_number,
+            "driver": self.driver_name,
+            "brand": self.brand,
+            "year": self.manufacturing_year,
+            "region": self.region_code,  # 1
+        }
+
+    def _get_qr_payload_format(self):
+        """QR payload format: "json" (readable) or "compact" (signed, small)"""
+        payload_format = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("rdc_printer.qr_payload_format", "json")
+        )
+        return "compact" if payload_format == "compact" else "json"
+
+    def _get_qr_signing_key(self):
+        """Key used to sign compact QR payloads"""
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        key = get_param("rdc_printer.qr_signing_key") or get_param("database.secret")
+        return key.encode()
+
+    def _sign_qr_message(self, message):
+        """Short HMAC of a compact payload, base32 so it stays QR alphanumeric"""
+        digest = hmac.new(
+            self._get_qr_signing_key(), message.encode(), hashlib.sha256
+        ).digest()
+        return base64.b32encode(digest[:QR_SIGNATURE_BYTES]).decode().rstrip("=")
+
+    def _encode_compact_qr_payload(self, qr_data):
+        """Encode the QR data as RDC1:PLATE:UNIQUE_ID:CHASSIS:YEAR:SIGNATURE
+
+        Fixed field order, upper case separators and the chassis key (upper
+        case, no whitespace) keep the payload in the QR alphanumeric mode; the
+        region is the last two digits of the plate.
+        """
+        message = ":".join(
+            [
+                QR_COMPACT_PREFIX,
+                qr_data["plate"] or "",
+                qr_data["unique_id"] or "",
+                self._normalize_chassis(qr_data["chassis"]) or "",
+                str(qr_data["year"] or ""),
+            ]
+        )
+        return f"{message}:{self._sign_qr_message(message)}"
+
+    @api.model
+    def _decode_qr_payload(self, payload):
+        """Decode a scanned QR payload in either format
+
+        Returns chassis, plate, unique_id, region and year, plus whether the
+        signature of a compact payload is valid (None for JSON payloads).
+        """
+        payload = (payload or "").strip()
+        if payload.startswith(f"{QR_COMPACT_PREFIX}:"):
+            parts = payload.split(":")
+            if len(parts) < 6:
+                raise models.ValidationError("Malformed compact QR payload")
+            plate, unique_id = parts[1], parts[2]
+            # The chassis is the only field that could itself contain ":"
+            chassis, year, signature = ":".join(parts[3:-2]), parts[-2], parts[-1]
+            message = payload[: -len(signature) - 1]
+            return {
+                "format": "compact",
+                "chassis": chassis,
+                "plate": plate,
+                "unique_id": unique_id,
+                "region": plate[-2:] if plate else None,
+                "year": int(year) if year.isdigit() else None,
+                "signature_valid": hmac.compare_digest(
+                    signature, self._sign_qr_message(message)
+                ),
             }
+        try:
+            qr_data = json.loads(payload)
+        except ValueError:
+            raise models.ValidationError("QR payload is neither compact nor JSON")
+        if not isinstance(qr_data, dict):
+            raise models.ValidationError("QR payload is neither compact nor JSON")
+        return {
+            "format": "json",
+            "chassis": qr_data.get("chassis"),
+            "plate": qr_data.get("plate"),
+            "unique_id": qr_data.get("unique_id"),
+            "region": qr_data.get("region"),
+            "year": qr_data.get("year"),
+            "signature_valid": None,
+        }
 
-        _logger.info(f"Generating QR code for chassis: {record.chassis_number}")
-        _logger.info(f"QR Data: {json.dumps(qr_data, indent=2)}")
+    def _get_outdated_qr_codes(self, force=False):
+        """Return (record, qr_code_data, payload, payload_hash) for outdated QR codes"""
+        compact = self._get_qr_payload_format() == "compact"
+        outdated = []
+        for record in self:
+            qr_data = record._get_qr_payload()
+            if compact:
+                payload = qr_code_data = record._encode_compact_qr_payload(qr_data)
+            else:
+                payload = json.dumps(qr_data)
+                qr_code_data = json.dumps(qr_data, indent=2)  # 1
+            payload_hash = hashlib.sha256(payload.encode()).hexdigest()
 
-        # Generate QR code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(json.dumps(qr_data))
-        qr.make(fit=True)
+            # The stored hash is the persistent cache: skip unchanged payloads
+            has_image = record.with_context(bin_size=True).qr_code_image
+            if not force and record.qr_code_hash == payload_hash and has_image:
+                continue
+            outdated.append((record, qr_code_data, payload, payload_hash))
+        return outdated
 
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
+    def _store_qr_code(self, qr_code_data, qr_image_base64, payload_hash):
+        """Store both text and image of a rendered QR code"""
+        self.ensure_one()
+        self.write(
+            {
+                "qr_code_data": qr_code_data,
+                "qr_code_image": qr_image_base64,
+                "qr_code_hash": payload_hash,
+            }
+        )
 
-        # Convert to base64 for storage
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        qr_image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    def generate_qr_code(self):
+        """Generate actual QR code image"""
+        outdated = self._get_outdated_qr_codes()
+        for record, qr_code_data, payload, payload_hash in outdated:
+            _logger.info(f"Generating QR code for chassis: {record.chassis_number}")
+            _logger.info(f"QR Data: {qr_code_data}")
 
-        # Store both text and image
-        # record.qr_code_data = json.dumps(qr_data)
-        record.qr_code_data = json.dumps(qr_data, indent=2)  # 1
-        record.qr_code_image = qr_image_base64
+            qr_image_base64 = _render_qr_code(payload)
+            record._store_qr_code(qr_code_data, qr_image_base64, payload_hash)
 
-        _logger.info(f"QR code generated successfully for {record.chassis_number}")
-        _logger.info(f"QR image size: {len(qr_image_base64)} characters (base64)")
+            _logger.info(f"QR code generated successfully for {record.chassis_number}")
+            _logger.info(f"QR image size: {len(qr_image_base64)} characters (base64)")
 
         return True
 
-    # 2
-    def _generate_plate_number(self, region_code):
-        """Generate next plate number for the region"""
-        # Find or create sequence for this region
-        sequence_obj = self.env["plate.sequence"].search(
-            [("region_code", "=", region_code)]
+    def action_generate_qr_codes_batch(self):
+        """Regenerate the QR codes of the selected vehicles in parallel"""
+        rendered = self._generate_qr_codes_parallel(force=True)
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "success",
+                "message": f"{rendered} QR codes regenerated",
+            },
+        }
+
+    @api.model
+    def _cron_generate_qr_codes(self, domain=None, force=False):
+        """Regenerate QR codes of all matching vehicles, committing every chunk"""
+        vehicles = self.search(domain or [], order="id")
+        vehicles._generate_qr_codes_parallel(force=force, commit=True)
+
+    def _generate_qr_codes_parallel(self, force=False, commit=False):
+        """Render QR codes chunk by chunk, in a process pool for large batches
+
+        Rendering is CPU bound, so batches of at least QR_POOL_THRESHOLD
+        vehicles are fanned out to a few worker processes while this process
+        reads payloads and writes results back once per chunk. Smaller batches
+        are rendered inline: forking costs more than it saves there.
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        chunk_size = int(get_param("rdc_printer.qr_batch_chunk_size", 500))
+        threshold = int(
+            get_param("rdc_printer.qr_batch_pool_threshold", QR_POOL_THRESHOLD)
         )
+        workers = 0
+        if len(self) >= threshold:
+            workers = int(get_param("rdc_printer.qr_batch_workers", 0))
+            workers = min(workers or os.cpu_count() or 1, QR_POOL_MAX_WORKERS)
 
-        if not sequence_obj:
-            # Create new sequence starting at 0
-            sequence_obj = self.env["plate.sequence"].create(
-                {"region_code": region_code, "current_sequence": 0}
+        total = len(self)
+        done = rendered = 0
+        started = time.monotonic()
+        _logger.info(
+            f"Batch QR generation: {total} vehicles, "
+            + (f"{workers} processes" if workers > 1 else "inline")
+        )
+        executor = None
+        if workers > 1:
+            # Fork so the pool inherits this module without re-importing Odoo;
+            # the children only run _render_qr_code and never use the cursor
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
             )
+        with executor or nullcontext():
+            for ids in split_every(chunk_size, self.ids):
+                chunk = self.browse(ids)
+                outdated = chunk._get_outdated_qr_codes(force=force)
+                payloads = [payload for _, _, payload, _ in outdated]
+                if executor:
+                    images = executor.map(
+                        _render_qr_code,
+                        payloads,
+                        chunksize=max(1, len(payloads) // (workers * 4)),
+                    )
+                else:
+                    images = map(_render_qr_code, payloads)
+                for (record, qr_code_data, _, payload_hash), image in zip(
+                    outdated, images
+                ):
+                    record._store_qr_code(qr_code_data, image, payload_hash)
+                chunk.flush_recordset()
+                if commit:
+                    self.env.cr.commit()
+                chunk.invalidate_recordset()
 
-        # Get next number (increment by 1)
-        sequence_obj.current_sequence += 1
-        sequence_number = sequence_obj.current_sequence
+                done += len(chunk)
+                rendered += len(outdated)
+                elapsed = time.monotonic() - started
+                _logger.info(
+                    f"Batch QR generation: {done}/{total} vehicles, "
+                    f"{rendered} rendered, {done / elapsed:.1f} vehicles/s"
+                )
+        return rendered
 
+    # 2
+    def _generate_plate_number(self, region_code):
+        """Generate next plate number for the region"""
+        sequence_number = self.env["plate.sequence"]._allocate_numbers(region_code)[0]
+        return self._format_plate_number(sequence_number, region_code)
+
+    @api.model
+    def _format_plate_number(self, sequence_number, region_code):
+        """Encode a sequence number as NNNNLLRR"""
         # Calculate the letters (AA, AB, AC, ... ZZ)
         letter_position = (
             sequence_number - 1
@@ -218,18 +1025,280 @@ class VehicleRegistration(models.Model):
     # 3
     def action_print_carte_rose(self):
         """Generate and print Carte Rose"""
-        if not self.qr_code_image:
+        if not self.with_context(bin_size=True).qr_code_image:
             self.generate_qr_code()
-        self.env["vehicle.print.history"].create(
+        self.env["vehicle.print.log"]._log(
+            [
+                {
+                    "vehicle_id": self.id,
+                    "print_type": "carte_rose",
+                    "printer_name": self._get_default_printer(),
+                    "notes": "Carte Rose printed",
+                }
+            ]
+        )
+        self._get_carte_rose_pdf()
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/web/content/{self.carte_rose_attachment_id.id}?download=true",
+            "target": "self",
+        }
+
+    @tools.ormcache(cache="templates")
+    def _get_carte_rose_template_version(self):
+        """Version of the carte rose layout, changes on module or template update"""
+        write_dates = [
+            str(self.env.ref(xmlid).sudo().write_date) for xmlid in CARTE_ROSE_TEMPLATES
+        ]
+        module = (
+            self.env["ir.module.module"]
+            .sudo()
+            .search([("name", "=", "rdc_printer")], limit=1)
+        )
+        return "/".join([module.latest_version or "", *write_dates])
+
+    def _get_carte_rose_cache_key(self, renderer=None):
+        """Hash of everything that ends up on the printed card"""
+        self.ensure_one()
+        values = {
+            field: self[field] for field in CARTE_ROSE_FIELDS - {"qr_code_image"}
+        }
+        values["qr_code_hash"] = self.qr_code_hash
+        values["lang"] = self.env.lang
+        values["renderer"] = renderer or self._get_carte_rose_renderer()
+        values["template"] = self._get_carte_rose_template_version()
+        return hashlib.sha256(
+            json.dumps(values, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _get_carte_rose_pdf(self):
+        """Rendered carte rose PDF, reused while the printed content is unchanged"""
+        self.ensure_one()
+        cache_key = self._get_carte_rose_cache_key()
+        attachment = self.sudo().carte_rose_attachment_id
+        if attachment and self.carte_rose_cache_key == cache_key:
+            return attachment.raw
+
+        pdf, renderer = self._render_carte_rose_pdf()
+        attachment.unlink()
+        self.sudo().write(
+            {
+                # Key the PDF on the renderer that drew it, which differs from
+                # the configured one when the native renderer fell back to QWeb
+                "carte_rose_cache_key": self._get_carte_rose_cache_key(renderer),
+                "carte_rose_attachment_id": self.env["ir.attachment"]
+                .sudo()
+                .create(
+                    {
+                        "name": f"carte_rose_{self.chassis_number}.pdf",
+                        "raw": pdf,
+                        "mimetype": "application/pdf",
+                        "res_model": self._name,
+                        "res_id": self.id,
+                    }
+                )
+                .id,
+            }
+        )
+        return pdf
+
+    def _clear_carte_rose_cache(self):
+        """Drop cached carte rose PDFs"""
+        cached = self.filtered("carte_rose_attachment_id")
+        if cached:
+            attachments = cached.sudo().carte_rose_attachment_id
+            cached.sudo().write(
+                {"carte_rose_cache_key": False, "carte_rose_attachment_id": False}
+            )
+            attachments.unlink()
+
+    def _get_carte_rose_renderer(self):
+        """Carte rose rendering engine: "qweb" (wkhtmltopdf) or "native" (Pillow)"""
+        renderer = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("rdc_printer.carte_rose_renderer", "qweb")
+        )
+        return "native" if renderer == "native" else "qweb"
+
+    def _get_carte_rose_values(self):
+        """Printed carte rose fields, formatted as the QWeb template shows them"""
+        self.ensure_one()
+        return {
+            "unique_plate_number": self.unique_plate_number,
+            "driver_name": self.driver_name,
+            "driver_address": self.driver_address,
+            "tax_number": self.tax_number,
+            "first_registration": self.first_registration,
+            "usage": self.usage,
+            "plate_sequence": self.plate_sequence,
+            "print_date": format_date(self.env, self.print_date),
+            "brand": self.brand,
+            "vehicle_type": self.vehicle_type,
+            "chassis_number": self.chassis_number,
+            "manufacturing_year": self.manufacturing_year,
+            "color": self.color,
+            "fiscal_power": self.fiscal_power,
+            "qr_code_image": (
+                base64.b64decode(self.qr_code_image) if self.qr_code_image else None
+            ),
+        }
+
+    def _render_carte_rose_native(self, layout="card"):
+        """Render the cards with Pillow at the printer resolution
+
+        Cards are drawn and written to PDF one A4 sheet worth at a time, so a
+        batch only ever holds the 300 dpi images of a single sheet in memory.
+        """
+        renderer = CarteRoseRenderer()
+        pdfs = []
+        for records in split_every(CARDS_PER_SHEET, self.ids, self.browse):
+            cards = [
+                renderer.render(record._get_carte_rose_values()) for record in records
+            ]
+            if layout == "sheet":
+                pages = renderer.impose(cards)
+            else:
+                pages = [side for card in cards for side in card]
+            pdfs.append(renderer.to_pdf(pages))
+            records.invalidate_recordset(["qr_code_image"])
+        return pdfs[0] if len(pdfs) == 1 else merge_pdf(pdfs)
+
+    def _render_carte_rose_pdf(self, layout="card"):
+        """Render the carte rose of these vehicles as one PDF
+
+        The "card" layout prints one card side per page for the card printer,
+        "sheet" imposes 10 cards per A4 page (fronts, then mirrored backs).
+        Returns the PDF and the renderer that actually drew it.
+        """
+        if self._get_carte_rose_renderer() == "native":
+            try:
+                return self._render_carte_rose_native(layout), "native"
+            except Exception:
+                _logger.exception("Native carte rose rendering failed, using QWeb")
+        report_ref = (
+            "rdc_printer.action_report_carte_rose_sheet"
+            if layout == "sheet"
+            else "rdc_printer.action_report_carte_rose"
+        )
+        pdf, _ = (
+            self.env["ir.actions.report"].sudo()._render_qweb_pdf(report_ref, self.ids)
+        )
+        return pdf, "qweb"
+
+    def action_print_carte_rose_batch(self):
+        """Print the carte rose of all selected vehicles on A4 sheets"""
+        pdf = self._print_carte_rose_batch(layout="sheet")
+        attachment = self.env["ir.attachment"].create(
             {
-                "vehicle_id": self.id,
-                "print_type": "carte_rose",
-                "printer_name": "Authentys Pro RT1",
-                "print_status": "success",
-                "notes": "Carte Rose printed",
+                "name": f"{CARTE_ROSE_BATCH_PREFIX}{len(self)}.pdf",
+                "raw": pdf,
+                "mimetype": "application/pdf",
+                "res_model": self._name,
+                "res_id": self[0].id,
             }
         )
-        return self.env.ref("rdc_printer.action_report_carte_rose").report_action(self)
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/web/content/{attachment.id}?download=true",
+            "target": "self",
+        }
+
+    def _start_registration_pipeline(self, staged_documents=None):
+        """Queue the QR code and document stages of an async registration"""
+        self.ensure_one()
+        tasks = [{"vehicle_id": self.id, "stage": "qr_code"}]
+        if staged_documents:
+            tasks.append(
+                {
+                    "vehicle_id": self.id,
+                    "stage": "documents",
+                    "payload": json.dumps(staged_documents),
+                }
+            )
+        self.registration_state = "processing"
+        return self.env["vehicle.registration.task"].sudo().create(tasks)
+
+    def _update_registration_state(self):
+        """Derive the registration state from the pipeline tasks"""
+        for record in self:
+            states = set(record.registration_task_ids.mapped("state"))
+            if "failed" in states:
+                record.registration_state = "failed"
+            elif "pending" in states:
+                record.registration_state = "processing"
+            else:
+                record.registration_state = "done"
+
+    @api.model
+    def _get_default_printer(self):
+        """Printer the spooler sends jobs queued without a printer name to"""
+        return (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("rdc_printer.default_printer", DEFAULT_PRINTER)
+        )
+
+    def _enqueue_print(self, print_type="carte_rose", printer_name=None, notes=None):
+        """Queue carte rose print jobs for the print spooler"""
+        printer_name = printer_name or self._get_default_printer()
+        return self.env["vehicle.print.history"].create(
+            [
+                {
+                    "vehicle_id": record.id,
+                    "print_type": print_type,
+                    "printer_name": printer_name,
+                    "print_status": "pending",
+                    "notes": notes or "Queued for printing",
+                }
+                for record in self
+            ]
+        )
+
+    def _print_carte_rose_batch(self, layout="card", printer_name=None, notes=None):
+        """Render all cards in one pass and log their prints in bulk"""
+        if not self:
+            raise models.UserError("No vehicle to print")
+        printer_name = printer_name or self._get_default_printer()
+        self.generate_qr_code()
+        pdf, _ = self._render_carte_rose_pdf(layout)
+        self.env["vehicle.print.log"]._log(
+            [
+                {
+                    "vehicle_id": record.id,
+                    "print_type": "carte_rose",
+                    "printer_name": printer_name,
+                    "notes": notes or f"Carte Rose batch print ({layout})",
+                }
+                for record in self
+            ]
+        )
+        return pdf
+
+    @api.autovacuum
+    def _gc_carte_rose_batches(self):
+        """Delete downloaded batch PDFs of action_print_carte_rose_batch"""
+        expired_before = fields.Datetime.now() - timedelta(hours=CARTE_ROSE_BATCH_TTL)
+        self.env["ir.attachment"].sudo().search(
+            [
+                ("res_model", "=", self._name),
+                ("name", "=like", f"{CARTE_ROSE_BATCH_PREFIX}%"),
+                ("create_date", "<", expired_before),
+            ]
+        ).unlink()
+
+
+# Decodes NNNNLLRR plates back to their sequence number, see
+# VehicleRegistration._format_plate_number
+_ISSUED_PLATE_NUMBERS_SQL = """
+    SELECT region_code,
+           substr(plate_sequence, 1, 4)::int * 676
+           + (ascii(substr(plate_sequence, 5, 1)) - 65) * 26
+           + (ascii(substr(plate_sequence, 6, 1)) - 65) + 1 AS number
+      FROM vehicle_registration
+     WHERE plate_sequence ~ '^[0-9]{4}[A-Z]{2}[0-9]{2}$'
+       AND (%s IS NULL OR region_code = %s)
+"""
 
 
 # 2
@@ -270,6 +1339,9 @@ class PlateSequence(models.Model):
         required=True,
     )
     current_sequence = fields.Integer(string="Current Sequence", default=0)
+    sequence_id = fields.Many2one(
+        "ir.sequence", string="Database Sequence", readonly=True, ondelete="restrict"
+    )
     _sql_constraints = [
         (
             "unique_region",
@@ -278,6 +1350,264 @@ class PlateSequence(models.Model):
         )
     ]
 
+    @api.model
+    def _get_allocator_mode(self):
+        """Return the configured plate allocation strategy"""
+        mode = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("rdc_printer.plate_allocator", "row")
+        )
+        if mode not in PLATE_ALLOCATOR_MODES:
+            _logger.warning(f"Unknown plate allocator {mode!r}, using 'row'")
+            mode = "row"
+        return mode
+
+    @api.model
+    def _allocate_numbers(self, region_code, count=1):
+        """Reserve `count` sequence numbers for the region, in ascending order"""
+        mode = self._get_allocator_mode()
+        if mode == "sequence":
+            return self._allocate_from_db_sequence(region_code, count)
+        if mode == "block":
+            return self._allocate_from_block(region_code, count)
+        numbers = self._allocate_from_row(self.env.cr, region_code, count)
+        self.invalidate_model(["current_sequence"])
+        return numbers
+
+    @api.model
+    def _allocate_from_row(self, cr, region_code, count):
+        """Bump the region row with a single upsert and return the new numbers"""
+        cr.execute(
+            """
+            INSERT INTO plate_sequence
+                   (region_code, current_sequence, create_uid, create_date,
+                    write_uid, write_date)
+            VALUES (%s, %s, %s, now() at time zone 'UTC',
+                    %s, now() at time zone 'UTC')
+            ON CONFLICT (region_code) DO UPDATE
+               SET current_sequence = COALESCE(plate_sequence.current_sequence, 0)
+                                      + EXCLUDED.current_sequence,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+            RETURNING current_sequence
+            """,
+            (region_code, count, self.env.uid, self.env.uid),
+        )
+        last_number = cr.fetchone()[0]
+        return list(range(last_number - count + 1, last_number + 1))
+
+    @api.model
+    def _allocate_from_block(self, region_code, count):
+        """Hand out numbers from a block reserved by this worker process"""
+        block_size = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("rdc_printer.plate_block_size", 50)
+        )
+        key = (self.env.cr.dbname, region_code)
+        with _plate_blocks_lock:
+            next_number, last_number = _plate_blocks.get(key, (1, 0))
+            if last_number - next_number + 1 < count:
+                # Leftovers of the previous block become gaps in the audit
+                reserved = self._reserve_block(region_code, max(block_size, count))
+                next_number, last_number = reserved[0], reserved[-1]
+            _plate_blocks[key] = (next_number + count, last_number)
+        return list(range(next_number, next_number + count))
+
+    @api.model
+    def _reserve_block(self, region_code, size, attempts=5):
+        """Reserve a block in its own transaction so the row lock is held briefly"""
+        for attempt in range(attempts):
+            try:
+                with self.env.registry.cursor() as cr:
+                    return self._allocate_from_row(cr, region_code, size)
+            except pg_errors.SerializationFailure:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(random.uniform(0.01, 0.05) * (attempt + 1))
+
+    @api.model
+    def _allocate_from_db_sequence(self, region_code, count):
+        """Draw numbers from the region's native PostgreSQL sequence"""
+        sequence = self._get_region_sequence(region_code)
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            (f"ir_sequence_{sequence.id:03d}", count),
+        )
+        return sorted(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def _get_region_sequence(self, region_code):
+        """Return the ir.sequence backing the region, creating it on first use"""
+        record = self.sudo().search([("region_code", "=", region_code)], limit=1)
+        if record.sequence_id:
+            return record.sequence_id
+        if not record:
+            record = self.sudo().create({"region_code": region_code})
+        record.sequence_id = (
+            self.env["ir.sequence"]
+            .sudo()
+            .create(
+                {
+                    "name": f"Plate numbers - region {region_code}",
+                    "code": f"rdc_printer.plate.{region_code}",
+                    "implementation": "standard",
+                    "number_next": record.current_sequence + 1,
+                    "number_increment": 1,
+                    "padding": 0,
+                }
+            )
+        )
+        return record.sequence_id
+
+    def _get_allocated_until(self):
+        """Highest number handed out by the allocator for this region"""
+        self.ensure_one()
+        allocated = self.current_sequence
+        if self.sequence_id:
+            allocated = max(allocated, self.sequence_id.number_next_actual - 1)
+        return allocated
+
+    @api.model
+    def _sync_high_water_mark(self):
+        """Align the row counter and database sequences after switching allocator
+
+        Takes the highest number known to any strategy (row counter, native
+        sequence or plates already issued) so no number can be handed out twice.
+        Runs whenever the "rdc_printer.plate_allocator" parameter is changed.
+        """
+        issued = {
+            row["region_code"]: row["last_number"]
+            for row in self._get_issued_summary()
+        }
+        for record in self.sudo().search([]):
+            high = max(
+                record._get_allocated_until(), issued.get(record.region_code, 0)
+            )
+            record.current_sequence = high
+            if record.sequence_id:
+                record.sequence_id.number_next = high + 1
+        with _plate_blocks_lock:
+            for key in [k for k in _plate_blocks if k[0] == self.env.cr.dbname]:
+                del _plate_blocks[key]
+
+    @api.model
+    def _get_issued_summary(self, region_code=None):
+        """Count and range of the plate numbers actually issued, per region"""
+        self.env["vehicle.registration"].flush_model(["plate_sequence"])
+        self.env.cr.execute(
+            f"""
+            WITH issued AS ({_ISSUED_PLATE_NUMBERS_SQL})
+            SELECT region_code, count(*), count(DISTINCT number), max(number)
+              FROM issued
+             GROUP BY region_code
+            """,
+            (region_code, region_code),
+        )
+        return [
+            {
+                "region_code": region,
+                "issued": issued,
+                "distinct": distinct,
+                "last_number": last_number,
+            }
+            for region, issued, distinct, last_number in self.env.cr.fetchall()
+        ]
+
+    @api.model
+    def get_gap_report(self, region_code=None, max_ranges=100):
+        """Audit plate numbering: issued vs. allocated numbers and missing ranges
+
+        Numbers can go missing when a registration rolls back after drawing
+        from a native sequence, or when a worker stops with part of a reserved
+        block unused; this report makes those gaps visible.
+        """
+        self.env["vehicle.registration"].flush_model(["plate_sequence"])
+        self.env.cr.execute(
+            f"""
+            WITH issued AS ({_ISSUED_PLATE_NUMBERS_SQL}),
+            ordered AS (
+                SELECT region_code, number,
+                       lag(number) OVER (PARTITION BY region_code
+                                         ORDER BY number) AS previous
+                  FROM issued
+            )
+            SELECT region_code, COALESCE(previous, 0) + 1, number - 1
+              FROM ordered
+             WHERE number - COALESCE(previous, 0) > 1
+             ORDER BY region_code, number
+            """,
+            (region_code, region_code),
+        )
+        gaps = {}
+        for region, gap_start, gap_end in self.env.cr.fetchall():
+            gaps.setdefault(region, []).append((gap_start, gap_end))
+
+        sequences = {
+            record.region_code: record
+            for record in self.sudo().search(
+                [("region_code", "=", region_code)] if region_code else []
+            )
+        }
+        vehicle_model = self.env["vehicle.registration"]
+        report = []
+        for summary in self._get_issued_summary(region_code):
+            region = summary["region_code"]
+            sequence = sequences.get(region)
+            allocated = sequence._get_allocated_until() if sequence else 0
+            region_gaps = gaps.get(region, [])
+            if allocated > summary["last_number"]:
+                # Allocated but never used (tail of a block or rolled back)
+                region_gaps.append((summary["last_number"] + 1, allocated))
+            report.append(
+                {
+                    "region_code": region,
+                    "allocator": self._get_allocator_mode(),
+                    "allocated_until": allocated,
+                    "issued": summary["issued"],
+                    "duplicates": summary["issued"] - summary["distinct"],
+                    "missing": sum(end - start + 1 for start, end in region_gaps),
+                    "missing_ranges": [
+                        {
+                            "from": vehicle_model._format_plate_number(start, region),
+                            "to": vehicle_model._format_plate_number(end, region),
+                            "count": end - start + 1,
+                        }
+                        for start, end in region_gaps[:max_ranges]
+                    ],
+                }
+            )
+        return report
+
+
+class IrConfigParameter(models.Model):
+    _inherit = "ir.config_parameter"
+
+    # The row counter and the native sequences only follow their own mode, so
+    # they are realigned every time the plate allocator is switched
+    @api.model_create_multi
+    def create(self, vals_list):
+        params = super(IrConfigParameter, self).create(vals_list)
+        params._sync_plate_allocator()
+        return params
+
+    def write(self, vals):
+        res = super(IrConfigParameter, self).write(vals)
+        self._sync_plate_allocator()
+        return res
+
+    def unlink(self):
+        switched = self.filtered(lambda p: p.key == "rdc_printer.plate_allocator")
+        res = super(IrConfigParameter, self).unlink()
+        if switched:
+            self.env["plate.sequence"]._sync_high_water_mark()
+        return res
+
+    def _sync_plate_allocator(self):
+        if any(param.key == "rdc_printer.plate_allocator" for param in self):
+            self.env["plate.sequence"]._sync_high_water_mark()
+
 
 class PrintHistory(models.Model):
     _name = "vehicle.print.history"
@@ -287,15 +1617,7 @@ class PrintHistory(models.Model):
     vehicle_id = fields.Many2one(
         "vehicle.registration", string="Vehicle", required=True, ondelete="cascade"
     )
-    print_type = fields.Selection(
-        [
-            ("license_plate", "License Plate"),
-            ("carte_rose", "Carte Rose"),
-            ("reprint", "Reprint"),
-        ],
-        string="Print Type",
-        required=True,
-    )
+    print_type = fields.Selection(PRINT_TYPES, string="Print Type", required=True)
     print_date = fields.Datetime(string="Print Date", default=fields.Datetime.now)
     printer_name = fields.Char(string="Printer Name")
     print_status = fields.Selection(
@@ -304,3 +1626,215 @@ class PrintHistory(models.Model):
         default="pending",
     )
     notes = fields.Text(string="Notes")
+    attempt_count = fields.Integer(string="Attempts", default=0, readonly=True)
+    next_attempt_date = fields.Datetime(string="Next Attempt", readonly=True)
+    error_message = fields.Text(string="Last Error", readonly=True)
+
+    def init(self):
+        # Spooler lookups only ever touch the pending jobs of one printer
+        tools.create_index(
+            self.env.cr,
+            "vehicle_print_history_pending_idx",
+            self._table,
+            ["printer_name", "id"],
+            where="print_status = 'pending'",
+        )
+        # History of one vehicle, newest first
+        tools.create_index(
+            self.env.cr,
+            "vehicle_print_history_vehicle_id_print_date_idx",
+            self._table,
+            ["vehicle_id", "print_date DESC"],
+        )
+        # Change feed (/api/vehicle/changes)
+        tools.create_index(
+            self.env.cr,
+            "vehicle_print_history_write_date_id_idx",
+            self._table,
+            ["write_date", "id"],
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        jobs = super(PrintHistory, self).create(vals_list)
+        if jobs.filtered(
+            lambda job: job.print_status == "pending"
+            and job.print_type in SPOOLED_PRINT_TYPES
+        ):
+            cron = self.env.ref(
+                "rdc_printer.ir_cron_process_print_queue", raise_if_not_found=False
+            )
+            if cron:
+                cron.sudo()._trigger()
+        return jobs
+
+    def unlink(self):
+        self.env["vehicle.sync.tombstone"]._record(self)
+        return super(PrintHistory, self).unlink()
+
+    @api.model
+    def _cron_process_print_queue(self):
+        """Print spooler: run one worker per printer slot with pending jobs"""
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        concurrency = int(get_param("rdc_printer.printer_concurrency", 1))
+        deadline = time.monotonic() + int(
+            get_param("rdc_printer.spooler_time_budget", 240)
+        )
+
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT printer_name
+              FROM vehicle_print_history
+             WHERE print_status = 'pending' AND print_type IN %s
+            """,
+            (SPOOLED_PRINT_TYPES,),
+        )
+        printers = [row[0] for row in self.env.cr.fetchall()]
+        # The workers use their own cursors; ending this transaction keeps the
+        # cron from holding back the change feed horizon while they print
+        self.env.cr.commit()
+        if not printers:
+            return 0
+
+        workers = [printer for printer in printers for _ in range(concurrency)]
+        with ThreadPoolExecutor(
+            max_workers=min(len(workers), SPOOLER_MAX_THREADS)
+        ) as executor:
+            processed = sum(
+                executor.map(lambda printer: self._spool(printer, deadline), workers)
+            )
+        _logger.info(f"Print spooler: {processed} jobs on {len(printers)} printers")
+        return processed
+
+    @api.model
+    def _spool(self, printer_name, deadline):
+        """Worker loop: print the jobs of one printer until none is left"""
+        processed = 0
+        with self.env.registry.cursor() as cr:
+            env = self.env(cr=cr)
+            while time.monotonic() < deadline:
+                if not env["vehicle.print.history"]._process_next_job(printer_name):
+                    break
+                processed += 1
+        return processed
+
+    @api.model
+    def _process_next_job(self, printer_name):
+        """Claim, print and close one pending job of the printer
+
+        A printer slot is an advisory lock held for the transaction, so at
+        most rdc_printer.printer_concurrency jobs print at once per printer
+        across all workers; the job row itself is claimed with SKIP LOCKED.
+        """
+        cr = self.env.cr
+        concurrency = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("rdc_printer.printer_concurrency", 1)
+        )
+        printer_key = zlib.crc32((printer_name or "").encode()) - 2**31
+        for slot in range(concurrency):
+            cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", (printer_key, slot))
+            if cr.fetchone()[0]:
+                break
+        else:
+            return False  # every slot of this printer is busy
+
+        cr.execute(
+            """
+            SELECT id
+              FROM vehicle_print_history
+             WHERE print_status = 'pending'
+               AND print_type IN %s
+               AND printer_name IS NOT DISTINCT FROM %s
+               AND (next_attempt_date IS NULL
+                    OR next_attempt_date <= now() at time zone 'UTC')
+             ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+            """,
+            (SPOOLED_PRINT_TYPES, printer_name),
+        )
+        row = cr.fetchone()
+        if not row:
+            cr.commit()
+            return False
+
+        job = self.sudo().browse(row[0])
+        attempts = job.attempt_count + 1
+        try:
+            with cr.savepoint():
+                job.vehicle_id.generate_qr_code()
+                job._send_to_printer(job.vehicle_id._get_carte_rose_pdf())
+            job.write(
+                {
+                    "print_status": "success",
+                    "print_date": fields.Datetime.now(),
+                    "attempt_count": attempts,
+                    "next_attempt_date": False,
+                    "error_message": False,
+                }
+            )
+            self.env["vehicle.print.log"]._log(
+                [
+                    {
+                        "vehicle_id": job.vehicle_id.id,
+                        "job_id": job.id,
+                        "print_type": job.print_type,
+                        "printer_name": printer_name,
+                        "notes": job.notes,
+                    }
+                ]
+            )
+        except Exception as e:
+            _logger.warning(f"Print job {job.id} on {printer_name} failed: {e}")
+            max_attempts = int(
+                self.env["ir.config_parameter"]
+                .sudo()
+                .get_param("rdc_printer.print_max_attempts", 5)
+            )
+            retry = attempts < max_attempts
+            job.write(
+                {
+                    "print_status": "pending" if retry else "failed",
+                    "attempt_count": attempts,
+                    "next_attempt_date": retry
+                    and fields.Datetime.now()
+                    + timedelta(seconds=SPOOLER_RETRY_DELAY * 2 ** (attempts - 1)),
+                    "error_message": str(e),
+                }
+            )
+        cr.commit()
+        return True
+
+    def _send_to_printer(self, document):
+        """Hand a rendered document to the job's printer
+
+        Uses the hot folder in rdc_printer.spool_directory when configured
+        (one sub-directory per printer), otherwise the CUPS `lp` command.
+        """
+        self.ensure_one()
+        spool_directory = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("rdc_printer.spool_directory")
+        )
+        if spool_directory:
+            directory = os.path.join(
+                spool_directory, re.sub(r"[^\w.-]", "_", self.printer_name or "Default")
+            )
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"job_{self.id}.pdf")
+            # Write then rename, so the printer never picks up a partial file
+            with open(f"{path}.part", "wb") as spool_file:
+                spool_file.write(document)
+            os.replace(f"{path}.part", path)
+            return
+        if not shutil.which("lp"):
+            raise models.UserError("No print backend configured")
+        command = ["lp", "-t", f"job_{self.id}"]
+        if self.printer_name and self.printer_name != "Default":
+            command += ["-d", self.printer_name]
+        subprocess.run(
+            command, input=document, check=True, capture_output=True, timeout=60
+        )
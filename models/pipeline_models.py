@@ -0,0 +1,149 @@
+from datetime import timedelta
+from odoo import models, fields, api, tools
+import json
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Failed stages are retried after PIPELINE_RETRY_DELAY seconds (doubled after
+# each attempt) until PIPELINE_MAX_ATTEMPTS is reached
+PIPELINE_MAX_ATTEMPTS = 5
+PIPELINE_RETRY_DELAY = 10
+
+
+class RegistrationTask(models.Model):
+    _name = "vehicle.registration.task"
+    _description = "Vehicle Registration Pipeline Task"
+    _order = "id"
+
+    vehicle_id = fields.Many2one(
+        "vehicle.registration",
+        string="Vehicle",
+        required=True,
+        index=True,
+        ondelete="cascade",
+    )
+    stage = fields.Selection(
+        [("qr_code", "QR Code"), ("documents", "Documents")],
+        string="Stage",
+        required=True,
+    )
+    state = fields.Selection(
+        [("pending", "Pending"), ("done", "Done"), ("failed", "Failed")],
+        string="State",
+        default="pending",
+        required=True,
+    )
+    payload = fields.Text(string="Payload")
+    attempt_count = fields.Integer(string="Attempts", default=0)
+    next_attempt_date = fields.Datetime(string="Next Attempt")
+    error_message = fields.Text(string="Last Error")
+
+    def init(self):
+        tools.create_index(
+            self.env.cr,
+            "vehicle_registration_task_pending_idx",
+            self._table,
+            ["id"],
+            where="state = 'pending'",
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tasks = super(RegistrationTask, self).create(vals_list)
+        cron = self.env.ref(
+            "rdc_printer.ir_cron_process_registration_pipeline",
+            raise_if_not_found=False,
+        )
+        if cron:
+            cron.sudo()._trigger()
+        return tasks
+
+    @api.model
+    def _cron_process_pipeline(self, time_budget=240):
+        """Run pending pipeline stages, one committed transaction per task"""
+        cr = self.env.cr
+        deadline = time.monotonic() + time_budget
+        processed = 0
+        while time.monotonic() < deadline:
+            cr.execute(
+                """
+                SELECT id
+                  FROM vehicle_registration_task
+                 WHERE state = 'pending'
+                   AND (next_attempt_date IS NULL
+                        OR next_attempt_date <= now() at time zone 'UTC')
+                 ORDER BY id
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+                """
+            )
+            row = cr.fetchone()
+            if not row:
+                break
+            self.browse(row[0])._run()
+            cr.commit()
+            processed += 1
+        if processed:
+            _logger.info(f"Registration pipeline: {processed} tasks processed")
+        return processed
+
+    def _run(self):
+        """Run the stage, scheduling a retry or failing it on error"""
+        self.ensure_one()
+        attempts = self.attempt_count + 1
+        try:
+            with self.env.cr.savepoint():
+                getattr(self, f"_run_{self.stage}")()
+            self.write(
+                {"state": "done", "attempt_count": attempts, "error_message": False}
+            )
+        except Exception as e:
+            _logger.warning(f"Registration task {self.id} ({self.stage}) failed: {e}")
+            retry = attempts < PIPELINE_MAX_ATTEMPTS
+            self.write(
+                {
+                    "state": "pending" if retry else "failed",
+                    "attempt_count": attempts,
+                    "next_attempt_date": retry
+                    and fields.Datetime.now()
+                    + timedelta(seconds=PIPELINE_RETRY_DELAY * 2 ** (attempts - 1)),
+                    "error_message": str(e),
+                }
+            )
+        self.vehicle_id._update_registration_state()
+
+    def _run_qr_code(self):
+        self.vehicle_id.generate_qr_code()
+
+    def _run_documents(self):
+        """Turn the staged attachments into vehicle documents
+
+        The staged attachment becomes the document file as is, its content is
+        neither read nor copied.
+        """
+        for staged in json.loads(self.payload or "[]"):
+            attachment = self.env["ir.attachment"].sudo().browse(staged["attachment_id"])
+            document = (
+                self.env["vehicle.document"]
+                .sudo()
+                .create(
+                    {
+                        "vehicle_id": self.vehicle_id.id,
+                        "document_name": staged["name"],
+                        "document_type": staged["type"],
+                        "file_name": staged["filename"],
+                        "checksum": staged.get("checksum"),
+                        "file_size": attachment.file_size,
+                        "mimetype": attachment.mimetype,
+                    }
+                )
+            )
+            attachment.write(
+                {
+                    "res_model": document._name,
+                    "res_field": "document_file",
+                    "res_id": document.id,
+                }
+            )
@@ -0,0 +1,156 @@
+from dateutil.relativedelta import relativedelta
+from odoo import models, fields, api, tools
+from odoo.tools import SQL, split_every
+from .models import PRINT_TYPES
+import logging
+import psycopg2
+
+_logger = logging.getLogger(__name__)
+
+# Monthly partitions are created this many months in advance
+PRINT_LOG_MONTHS_AHEAD = 3
+
+# Rows per INSERT statement when the buffered log is written
+PRINT_LOG_INSERT_SIZE = 1000
+
+# Key of the rows waiting in the cursor's precommit data
+PRINT_LOG_BUFFER = "vehicle.print.log"
+
+
+class PrintLog(models.Model):
+    """Append-only log of the cards and plates actually printed
+
+    The table is partitioned by month on print_date (see init) and rows are
+    only ever inserted, in bulk, through _log. vehicle.print.history keeps
+    the print jobs waiting for or handled by the spooler.
+    """
+
+    _name = "vehicle.print.log"
+    _description = "Vehicle Print Log"
+    _auto = False
+    _order = "print_date desc, id desc"
+
+    vehicle_id = fields.Many2one("vehicle.registration", string="Vehicle", readonly=True)
+    job_id = fields.Many2one("vehicle.print.history", string="Print Job", readonly=True)
+    print_type = fields.Selection(PRINT_TYPES, string="Print Type", readonly=True)
+    print_date = fields.Datetime(string="Print Date", readonly=True)
+    printer_name = fields.Char(string="Printer Name", readonly=True)
+    print_status = fields.Selection(
+        [("success", "Success"), ("failed", "Failed")],
+        string="Print Status",
+        readonly=True,
+    )
+    notes = fields.Text(string="Notes", readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        if not tools.sql.table_exists(cr, self._table):
+            cr.execute(
+                """
+                CREATE TABLE vehicle_print_log (
+                    id bigserial,
+                    vehicle_id integer NOT NULL
+                        REFERENCES vehicle_registration (id) ON DELETE CASCADE,
+                    job_id integer,
+                    print_type varchar NOT NULL,
+                    print_date timestamp NOT NULL,
+                    printer_name varchar,
+                    print_status varchar NOT NULL,
+                    notes text,
+                    PRIMARY KEY (id, print_date)
+                ) PARTITION BY RANGE (print_date)
+                """
+            )
+            # Catches rows outside of the monthly partitions
+            cr.execute(
+                "CREATE TABLE vehicle_print_log_default"
+                " PARTITION OF vehicle_print_log DEFAULT"
+            )
+        tools.create_index(
+            cr,
+            "vehicle_print_log_vehicle_id_print_date_idx",
+            self._table,
+            ["vehicle_id", "print_date DESC"],
+        )
+        # Change feed (/api/vehicle/changes)
+        tools.create_index(
+            cr,
+            "vehicle_print_log_print_date_id_idx",
+            self._table,
+            ["print_date", "id"],
+        )
+        self._create_partitions()
+
+    @api.model
+    def _create_partitions(self, months_ahead=PRINT_LOG_MONTHS_AHEAD):
+        """Create the monthly partitions from this month to months_ahead"""
+        cr = self.env.cr
+        month = fields.Date.today().replace(day=1)
+        for _i in range(months_ahead + 1):
+            next_month = month + relativedelta(months=1)
+            partition = f"vehicle_print_log_{month:%Y_%m}"
+            if not tools.sql.table_exists(cr, partition):
+                try:
+                    with cr.savepoint():
+                        cr.execute(
+                            SQL(
+                                "CREATE TABLE %s PARTITION OF vehicle_print_log"
+                                " FOR VALUES FROM (%s) TO (%s)",
+                                SQL.identifier(partition),
+                                month,
+                                next_month,
+                            )
+                        )
+                except psycopg2.Error as e:
+                    # The default partition already holds rows of that month
+                    _logger.warning(f"Could not create print log partition {partition}: {e}")
+            month = next_month
+
+    @api.model
+    def _cron_create_partitions(self):
+        self._create_partitions()
+
+    @api.model
+    def _log(self, vals_list):
+        """Append print events to the log
+
+        Rows are buffered on the cursor and written with multi-row INSERTs
+        right before the transaction commits, whatever the number of print
+        paths that logged during the transaction.
+        """
+        cr = self.env.cr
+        buffer = cr.precommit.data.setdefault(PRINT_LOG_BUFFER, [])
+        if not buffer:
+            cr.precommit.add(self._flush_log)
+        # Transaction timestamp, as for write_date: the change feed relies on
+        # rows never being dated before their transaction started
+        now = cr.now()
+        buffer.extend(
+            (
+                vals["vehicle_id"],
+                vals.get("job_id"),
+                vals["print_type"],
+                vals.get("print_date") or now,
+                vals.get("printer_name"),
+                vals.get("print_status", "success"),
+                vals.get("notes"),
+            )
+            for vals in vals_list
+        )
+
+    def _flush_log(self):
+        rows = self.env.cr.precommit.data.pop(PRINT_LOG_BUFFER, [])
+        for chunk in split_every(PRINT_LOG_INSERT_SIZE, rows):
+            self.env.cr.execute(
+                SQL(
+                    """
+                    INSERT INTO vehicle_print_log
+                                (vehicle_id, job_id, print_type, print_date,
+                                 printer_name, print_status, notes)
+                         VALUES %s
+                    """,
+                    SQL(", ").join(
+                        SQL("(%s, %s, %s, %s, %s, %s, %s)", *row) for row in chunk
+                    ),
+                )
+            )
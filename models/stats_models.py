@@ -0,0 +1,155 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class StatsViewMixin(models.AbstractModel):
+    """Model over a materialized view of aggregated registry figures
+
+    Dashboards read these small tables instead of grouping the registration
+    and print tables; the views are refreshed by a cron without blocking
+    readers.
+    """
+
+    _name = "vehicle.stats.view.mixin"
+    _description = "Vehicle Statistics View"
+
+    # Set on every row by the view query, so reading it costs no write
+    refreshed_at = fields.Datetime(string="Refreshed At", readonly=True)
+
+    def _get_view_query(self):
+        raise NotImplementedError()
+
+    def _get_view_key(self):
+        """Columns that identify a row, needed to refresh concurrently"""
+        raise NotImplementedError()
+
+    def init(self):
+        if self._abstract:
+            return
+        # Recreated on every update so the definition follows the code
+        self.env.cr.execute(
+            SQL(
+                "DROP MATERIALIZED VIEW IF EXISTS %s",
+                SQL.identifier(self._table),
+            )
+        )
+        self.env.cr.execute(
+            SQL(
+                "CREATE MATERIALIZED VIEW %s AS (%s)",
+                SQL.identifier(self._table),
+                SQL(self._get_view_query()),
+            )
+        )
+        self.env.cr.execute(
+            SQL(
+                "CREATE UNIQUE INDEX %s ON %s (%s)",
+                SQL.identifier(f"{self._table}_key_idx"),
+                SQL.identifier(self._table),
+                SQL(", ").join(SQL.identifier(name) for name in self._get_view_key()),
+            )
+        )
+
+    def _refresh(self):
+        self.env.cr.execute(
+            SQL(
+                "REFRESH MATERIALIZED VIEW CONCURRENTLY %s",
+                SQL.identifier(self._table),
+            )
+        )
+
+    @api.model
+    def _get_refreshed_at(self):
+        """When the view was last refreshed, None while it is empty"""
+        self.env.cr.execute(
+            SQL("SELECT refreshed_at FROM %s LIMIT 1", SQL.identifier(self._table))
+        )
+        row = self.env.cr.fetchone()
+        return row and row[0]
+
+    @api.model
+    def _cron_refresh_stats(self):
+        """Refresh every statistics view"""
+        for model_name in ("vehicle.registration.stats", "vehicle.printer.stats"):
+            self.env[model_name]._refresh()
+
+
+class RegistrationStats(models.Model):
+    _name = "vehicle.registration.stats"
+    _inherit = "vehicle.stats.view.mixin"
+    _description = "Vehicle Registrations per Region and Day"
+    _auto = False
+    _order = "day desc, region_code"
+
+    day = fields.Date(string="Day", readonly=True)
+    region_code = fields.Char(string="Region", readonly=True)
+    registrations = fields.Integer(string="Registrations", readonly=True)
+    reprinted = fields.Integer(string="Reprinted", readonly=True)
+
+    def _get_view_query(self):
+        return """
+            SELECT row_number() OVER (ORDER BY day, region_code) AS id,
+                   day,
+                   region_code,
+                   registrations,
+                   reprinted,
+                   now() AT TIME ZONE 'UTC' AS refreshed_at
+              FROM (
+                    SELECT create_date::date AS day,
+                           region_code,
+                           count(*) AS registrations,
+                           count(*) FILTER (WHERE is_reprinted) AS reprinted
+                      FROM vehicle_registration
+                     GROUP BY 1, 2
+                   ) stats
+        """
+
+    def _get_view_key(self):
+        return ["day", "region_code"]
+
+
+class PrinterStats(models.Model):
+    _name = "vehicle.printer.stats"
+    _inherit = "vehicle.stats.view.mixin"
+    _description = "Vehicle Prints per Printer and Day"
+    _auto = False
+    _order = "day desc, printer_name"
+
+    day = fields.Date(string="Day", readonly=True)
+    printer_name = fields.Char(string="Printer Name", readonly=True)
+    prints = fields.Integer(string="Prints", readonly=True)
+    succeeded = fields.Integer(string="Succeeded", readonly=True)
+    failed = fields.Integer(string="Failed", readonly=True)
+
+    def _get_view_query(self):
+        # Finished print jobs, plus the direct prints of the print log (the
+        # jobs completed by the spooler are logged with their job_id)
+        return """
+            SELECT row_number() OVER (ORDER BY day, printer_name) AS id,
+                   day,
+                   printer_name,
+                   prints,
+                   succeeded,
+                   failed,
+                   now() AT TIME ZONE 'UTC' AS refreshed_at
+              FROM (
+                    SELECT print_date::date AS day,
+                           COALESCE(printer_name, '') AS printer_name,
+                           count(*) AS prints,
+                           count(*) FILTER (WHERE print_status = 'success') AS succeeded,
+                           count(*) FILTER (WHERE print_status = 'failed') AS failed
+                      FROM (
+                            SELECT print_date, printer_name, print_status
+                              FROM vehicle_print_history
+                             WHERE print_status IN ('success', 'failed')
+                            UNION ALL
+                            SELECT print_date, printer_name, print_status
+                              FROM vehicle_print_log
+                             WHERE job_id IS NULL
+                           ) prints
+                     WHERE print_date IS NOT NULL
+                     GROUP BY 1, 2
+                   ) stats
+        """
+
+    def _get_view_key(self):
+        return ["day", "printer_name"]
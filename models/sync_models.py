@@ -0,0 +1,69 @@
+from datetime import timedelta
+from odoo import models, fields, api, tools
+
+# Deletions are kept this long; offices that have not synced since must
+# start over with a full sync
+SYNC_TOMBSTONE_DAYS = 180
+
+
+class SyncTombstone(models.Model):
+    _name = "vehicle.sync.tombstone"
+    _description = "Deleted Record (Change Feed)"
+    _order = "write_date, id"
+
+    res_model = fields.Char(string="Model", required=True)
+    res_id = fields.Integer(string="Record ID", required=True)
+
+    def init(self):
+        tools.create_index(
+            self.env.cr,
+            "vehicle_sync_tombstone_write_date_id_idx",
+            self._table,
+            ["write_date", "id"],
+        )
+
+    @api.model
+    def _record(self, records):
+        """Remember the deletion of records for the change feed"""
+        return self.sudo().create(
+            [{"res_model": record._name, "res_id": record.id} for record in records]
+        )
+
+    @api.model
+    def _get_retention_limit(self):
+        """Date before which tombstones are purged"""
+        return fields.Datetime.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+
+    @api.model
+    def _get_history_start(self):
+        """Oldest change date the deletion history is still complete from
+
+        Purged tombstones are older than both the retention limit and every
+        remaining tombstone, so a position past either one misses nothing.
+        """
+        limit = self._get_retention_limit()
+        oldest = self.sudo().search([], order="write_date, id", limit=1).write_date
+        return min(oldest, limit) if oldest else limit
+
+    @api.model
+    def _get_sync_horizon(self):
+        """Change date the feed can safely stream up to (excluded)
+
+        Changes are stamped no earlier than the start of the transaction that
+        writes them, so no row still to be committed is dated before the
+        oldest transaction running on the database.
+        """
+        self.env.cr.execute(
+            """
+            SELECT least(now(), min(xact_start)) AT TIME ZONE 'UTC'
+              FROM pg_stat_activity
+             WHERE datname = current_database()
+               AND backend_type = 'client backend'
+               AND pid <> pg_backend_pid()
+            """
+        )
+        return self.env.cr.fetchone()[0]
+
+    @api.autovacuum
+    def _gc_tombstones(self):
+        self.sudo().search([("write_date", "<", self._get_retention_limit())]).unlink()